@@ -0,0 +1,96 @@
+# api/jobs.py
+import os
+import time
+import threading
+from uuid import uuid4
+from concurrent.futures import ThreadPoolExecutor
+
+from services.pipeline import ingest_paths
+from services.trace import span
+
+INGEST_WORKERS = int(os.getenv("RAG_INGEST_WORKERS", "2"))
+MAX_FINISHED_JOBS = 500
+
+
+class IngestJobs:
+    """
+    Runs ingest jobs on a fixed pool of worker threads and keeps their status
+    in memory so clients can poll GET /jobs/{job_id}.
+    """
+
+    def __init__(self, workers=INGEST_WORKERS):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ingest")
+        self._jobs = {}
+        self._paths = {}   # job_id -> uploaded files, until the job cleans them up
+        self._lock = threading.Lock()
+
+    def submit(self, paths, upload_id=None):
+        job_id = str(uuid4())
+        upload_id = upload_id or str(uuid4())
+        job = {
+            "job_id": job_id,
+            "upload_id": upload_id,
+            "status": "queued",
+            "files": len(paths),
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+            self._paths[job_id] = paths
+            self._prune()
+        self._pool.submit(self._run, job_id, paths, upload_id)
+        return dict(job)
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            self._jobs[job_id].update(fields)
+
+    def _run(self, job_id, paths, upload_id):
+        self._update(job_id, status="running", started_at=time.time())
+        try:
+            with span("ingest", job_id=job_id):
+                result = ingest_paths(paths, upload_id=upload_id)
+            self._update(job_id, status="done", result=result, finished_at=time.time())
+        except Exception as e:
+            self._update(job_id, status="failed", error=f"{type(e).__name__}: {e}", finished_at=time.time())
+        finally:
+            self._cleanup(job_id)
+
+    def _cleanup(self, job_id):
+        with self._lock:
+            paths = self._paths.pop(job_id, [])
+        for p in paths:
+            try:
+                os.remove(p)
+                os.rmdir(os.path.dirname(p))
+            except OSError:
+                pass
+
+    def _prune(self):
+        finished = [j for j in self._jobs.values() if j["finished_at"] is not None]
+        if len(finished) <= MAX_FINISHED_JOBS:
+            return
+        finished.sort(key=lambda j: j["finished_at"])
+        for j in finished[:len(finished) - MAX_FINISHED_JOBS]:
+            del self._jobs[j["job_id"]]
+
+    def shutdown(self):
+        """
+        Lets running jobs finish (so nothing is stored without being
+        registered), cancels queued ones and removes their uploads.
+        """
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        with self._lock:
+            queued = [j["job_id"] for j in self._jobs.values() if j["status"] == "queued"]
+        for job_id in queued:
+            self._update(job_id, status="cancelled", finished_at=time.time())
+            self._cleanup(job_id)
@@ -0,0 +1,138 @@
+# api/server.py
+"""
+Headless HTTP API over the same pipeline as the Streamlit app.
+
+    uvicorn api.server:app --host 0.0.0.0 --port 8000
+"""
+import os
+import json
+import shutil
+import asyncio
+import tempfile
+from contextlib import asynccontextmanager
+from typing import List
+
+from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
+
+from api.jobs import IngestJobs
+from services.pipeline import answer_prompt_async, stream_answer
+from services.trace import render_prometheus
+from services import registry
+
+ALLOWED_TYPES = {"pdf", "pptx", "ppt", "docx", "doc", "txt", "zip", "md"}
+
+jobs = IngestJobs()
+
+
+@asynccontextmanager
+async def lifespan(app):
+    registry.start_gc_thread()
+    yield
+    await asyncio.to_thread(jobs.shutdown)
+
+
+app = FastAPI(title="Smart Study Buddy API", lifespan=lifespan)
+
+
+class QueryRequest(BaseModel):
+    prompt: str
+    upload_id: str
+    enable_image: bool = False
+    stream: bool = False
+
+
+def _write_upload(filename, src):
+    # keep the client's file name (one temp dir per file) so sources cite it
+    name = os.path.basename(filename.replace("\\", "/"))
+    path = os.path.join(tempfile.mkdtemp(prefix="upload_"), name)
+    with open(path, "wb") as out:
+        shutil.copyfileobj(src, out, 1024 * 1024)
+    return path
+
+
+async def _save_upload(f):
+    # all disk work happens in a worker thread, off the event loop
+    await f.seek(0)
+    return await asyncio.to_thread(_write_upload, f.filename, f.file)
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return render_prometheus()
+
+
+@app.post("/ingest", status_code=202)
+async def ingest(files: List[UploadFile] = File(...)):
+    """
+    Saves the uploads and queues them for the background ingest workers.
+    Poll /jobs/{job_id} until status is "done", then query with upload_id.
+    """
+    for f in files:
+        name = f.filename or ""
+        ext = name.rsplit(".", 1)[-1].lower() if "." in name else ""
+        if ext not in ALLOWED_TYPES:
+            raise HTTPException(status_code=400, detail=f"Unsupported file type: {f.filename}")
+
+    paths = [await _save_upload(f) for f in files]
+    return jobs.submit(paths)
+
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job id")
+    return job
+
+
+@app.get("/study-sets")
+async def list_study_sets():
+    return await asyncio.to_thread(registry.list_sets)
+
+
+@app.delete("/study-sets/{upload_id}")
+async def delete_study_set(upload_id: str):
+    """
+    Deletes the study set's vectors from the index and drops it from the registry.
+    """
+    if not await asyncio.to_thread(registry.exists, upload_id):
+        raise HTTPException(status_code=404, detail="Unknown study set")
+    if not await asyncio.to_thread(registry.forget, upload_id):
+        raise HTTPException(status_code=502, detail="Could not delete study set")
+    return {"upload_id": upload_id, "deleted": True}
+
+
+@app.post("/query")
+async def query(req: QueryRequest):
+    """
+    Answers a (possibly multi-sentence) question against a study set.
+    With stream=true the response is server-sent events, one per stage.
+    """
+    if not req.prompt.strip():
+        raise HTTPException(status_code=400, detail="Empty prompt")
+    # checked up front: once streaming starts the status code is already 200
+    if await asyncio.to_thread(registry.get, req.upload_id) is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired study set; ingest it again")
+
+    if not req.stream:
+        return await answer_prompt_async(req.prompt, req.upload_id, enable_image=req.enable_image)
+
+    async def events():
+        try:
+            async for event, data in stream_answer(req.prompt, req.upload_id, enable_image=req.enable_image):
+                yield _sse(event, data)
+        except Exception as e:
+            yield _sse("error", {"error": f"{type(e).__name__}: {e}"})
+
+    return StreamingResponse(events(), media_type="text/event-stream")
@@ -1,15 +1,17 @@
 import streamlit as st
 import time
-from uuid import uuid4
-import re
 
 from ui.upload import upload_files_widget
-from services.preview import merge_files
-from chunks.semantic_chunker import create_smart_chunks
-from embedding.preview_embedding import embed_sentences
-from services.store import store_chunks
-from services.hybrid import hybrid_rag
-from services.retrieve_chunks import retrieve_chunks
+from ui.timing import timing_breakdown_widget
+from ui.sources import sources_caption
+from services.pipeline import ingest_paths, answer_prompt
+from services.trace import span, start_metrics_server
+from services.registry import forget, start_gc_thread, StudySetTooLarge, StudySetNotFound
+
+start_metrics_server()
+start_gc_thread()
+
+STUDY_SET_EXPIRED = "⏰ Your study set was tidied away after sitting unused for a while. Please press **Start Studying!** again to reload your files."
 
 st.set_page_config(
     page_title="Smart Study Buddy", 
@@ -68,24 +70,17 @@ with st.sidebar:
         st.divider()
         if st.button("🚀 Start Studying!", type="primary", use_container_width=True):
             with st.status("⚙️ Organizing your notes...", expanded=True) as status:
+                try:
+                    with span("ingest"):
+                        ingested = ingest_paths(tmp_paths, on_step=st.write)
+                except StudySetTooLarge as e:
+                    status.update(label="❌ That's too much to memorize at once!", state="error")
+                    st.error(str(e))
+                    st.stop()
                 
-                st.write("📖 Reading files...")
-                resp = merge_files(tmp_paths)
-                
-                st.write("✂️ Creating smart study chunks...")
-                chunks = create_smart_chunks(resp["content"], resp["files_merged"])
-                
-                st.write("🧠 Memorizing content...")
-                text_list = [c["text"] for c in chunks]
-                vectors = embed_sentences(text_list)
-                
-                st.write("💾 Saving to Brain (Database)...")
-                new_id = str(uuid4())
-                store_chunks(new_id, resp["name"], chunks, vectors)
-                
-                st.session_state["current_upload_id"] = new_id
+                st.session_state["current_upload_id"] = ingested["upload_id"]
                 st.session_state.processing_done = True
-                st.session_state["total_chunks"] = len(chunks)
+                st.session_state["total_chunks"] = ingested["total_chunks"]
                 
                 status.update(label="✅ Ready to learn!", state="complete", expanded=False)
                 time.sleep(1)
@@ -97,18 +92,22 @@ with st.sidebar:
         st.markdown(f"**Knowledge chunks:** {st.session_state.get('total_chunks', 0)}")
         
         if st.button("🗑️ Clear & Start Over", type="secondary", use_container_width=True):
+            forget(st.session_state.current_upload_id)
             st.session_state.clear()
             st.rerun()
 
     st.divider()
     st.markdown("### 🎨 Creativity Mode")
     generate_viz = st.toggle("✨ Draw diagrams for me", value=True, help="I will draw a picture if I find a good answer!")
+    show_timing = st.toggle("⏱️ Show timing breakdown", value=False, help="See how long each step of the answer took.")
 
 st.title("🎓 Smart Study Buddy")
 
 for message in st.session_state.messages:
     with st.chat_message(message["role"]):
         st.markdown(message["content"])
+        if message.get("sources"):
+            st.caption(message["sources"])
         if message.get("image"):
             st.image(message["image"], caption="🎨 Here is a visual helper!", use_container_width=True)
 
@@ -125,56 +124,37 @@ if prompt := st.chat_input("Ex: What is Cybersecurity?"):
     with st.chat_message("assistant"):
         message_placeholder = st.empty()
         
-        with st.spinner("🤔 Thinking hard..."):
+        with st.spinner("🤔 Thinking hard..."), span("query") as query_span:
             upload_id = st.session_state.current_upload_id
             
-            # --- MODIFIED: Multi-Question Retrieval Logic ---
-            # Split the prompt into individual sentences/questions
-            sub_queries = re.split(r'(?<=[.?!])\s+', prompt)
-            sub_queries = [q.strip() for q in sub_queries if len(q.strip()) > 5]
-
-            all_combined_results = []
-            seen_chunk_ids = set()
-
-            # If re.split didn't find multiple sentences, use the full prompt
-            if not sub_queries:
-                sub_queries = [prompt]
-
-            for query_part in sub_queries:
-                # Retrieve chunks for each specific part of the user's input
-                part_results = retrieve_chunks(query_part, upload_id, limit=15, threshold=0.1)
-                
-                for res in part_results:
-                    # Deduplicate based on chunk_index
-                    if res["chunk_index"] not in seen_chunk_ids:
-                        all_combined_results.append(res)
-                        seen_chunk_ids.add(res["chunk_index"])
-            # ------------------------------------------------
-            
-            if not all_combined_results:
-                full_response = "I looked through your notes, but I couldn't find anything about those topics. 🤷‍♂️"
-                image_url = None
-            else:
-                # Use the combined chunks for the final RAG generation
-                rag_response = hybrid_rag(
-                    query=prompt, 
-                    dense_chunks=all_combined_results, 
-                    final_top_k=10, # Increased k to handle multiple topics
-                    enable_image=generate_viz
-                )
-                
-                full_response = rag_response["answer"]
-                image_url = rag_response.get("image_url")
-                
-                if rag_response["confidence"] < 0.35 and "I don't know" not in full_response:
-                    full_response += "\n\n> 🧐 *I'm not 100% sure, so please double-check your textbooks!*"
+            # Multi-question prompts are split into sub-queries inside answer_prompt
+            try:
+                rag_response = answer_prompt(prompt, upload_id, enable_image=generate_viz)
+                expired = False
+            except StudySetNotFound:
+                # cleaned up after sitting unused; the sidebar offers a fresh upload on rerun
+                rag_response = {"answer": STUDY_SET_EXPIRED}
+                expired = True
+                st.session_state.processing_done = False
+                st.session_state.current_upload_id = None
+            full_response = rag_response["answer"]
+            image_url = rag_response.get("image_url")
+            sources = sources_caption(rag_response.get("sources"))
 
         message_placeholder.markdown(full_response)
+        if sources:
+            st.caption(sources)
         if image_url:
             st.image(image_url, caption=f"🎨 Visual: {prompt}")
 
+    if show_timing:
+        timing_breakdown_widget(query_span)
+
     st.session_state.messages.append({
         "role": "assistant", 
         "content": full_response,
+        "sources": sources,
         "image": image_url
-    })
\ No newline at end of file
+    })
+    if expired:
+        st.rerun()
\ No newline at end of file
@@ -0,0 +1,294 @@
+# bench/chunking.py
+"""
+Checks the span-based chunker against the previous implementation.
+
+Both run over the same synthetic corpora. The report covers wall time (best
+of N), peak traced memory, and whether the chunks match: same count, same
+token counts, same text. It also shows how many files each chunk now cites
+instead of the whole upload.
+
+The "pdf" corpus adds `--- PAGE N ---` markers the way parser/file_intake.py
+does, with words hyphenated across page breaks. There the previous
+implementation chunks the same text without markers, since the span chunker
+has to give the same chunks and also record the pages. The "short" corpus
+is sprinkled with one-word sentences (headings, page numbers, a numeric
+table), which both implementations leave out of chunk text and token counts.
+Every chunk's `tokens` is also checked against the words in its text.
+
+    python -m bench.chunking --sizes 20000,100000 --repeat 3
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+from bench.corpus import write_corpus
+
+
+def legacy_create_smart_chunks(content, source_files):
+    """
+    create_smart_chunks as it was before the span rewrite, kept verbatim for comparison.
+    """
+    from chunks.semantic_chunker import nlp, MAX_TOKENS, OVERLAP_TOKENS
+
+    def count_tokens(text):
+        return len(text.split())
+
+    def clean_text(text):
+        if not text:
+            return ""
+        text = re.sub(r'(\w+)-\n(\w+)', r'\1\2', text)
+        text = re.sub(r'(\w+)-\s+(\w+)', r'\1\2', text)
+        text = re.sub(r'\s+', ' ', text)
+        text = re.sub(r'--- PAGE \d+ ---', '', text)
+        return text.strip()
+
+    cleaned_content = clean_text(content)
+
+    nlp.max_length = len(cleaned_content) + 100000
+    doc = nlp(cleaned_content)
+
+    sentences = [s.text.strip() for s in doc.sents if s.text.strip()]
+
+    chunks = []
+    chunk_index = 0
+    current_chunk_sents = []
+    current_length = 0
+
+    for sentence in sentences:
+        sent_len = count_tokens(sentence)
+        if sent_len < 2:
+            continue
+
+        if current_length + sent_len > MAX_TOKENS and current_chunk_sents:
+            text_block = " ".join(current_chunk_sents)
+            chunks.append({
+                "chunk_index": chunk_index,
+                "text": text_block,
+                "tokens": current_length,
+                "source_files": source_files
+            })
+            chunk_index += 1
+
+            overlap_buffer = []
+            overlap_len = 0
+            for old_sent in reversed(current_chunk_sents):
+                old_len = count_tokens(old_sent)
+                if overlap_len + old_len < OVERLAP_TOKENS:
+                    overlap_buffer.insert(0, old_sent)
+                    overlap_len += old_len
+                else:
+                    break
+
+            current_chunk_sents = overlap_buffer
+            current_length = overlap_len
+
+        current_chunk_sents.append(sentence)
+        current_length += sent_len
+
+    if current_chunk_sents:
+        chunks.append({
+            "chunk_index": chunk_index,
+            "text": " ".join(current_chunk_sents),
+            "tokens": current_length,
+            "source_files": source_files
+        })
+
+    return chunks
+
+
+def add_pdf_noise(content):
+    """
+    Hyphenated line breaks like PDF text extraction produces, so clean_text has work to do.
+    """
+    out = []
+    for i, word in enumerate(content.split(" ")):
+        if i % 37 == 5 and len(word) > 6 and word.isalpha():
+            word = word[:3] + "-\n" + word[3:]
+        out.append(word)
+    return " ".join(out)
+
+
+def add_page_markers(content, words_per_page=350):
+    """
+    Pages the text like a parsed PDF; every other page break falls inside a
+    hyphenated word ("mecha-" / "nism"). Returns (paged, plain), where plain
+    has a line break in place of each marker.
+    """
+    paged, plain = [], []
+    page, due = 1, False
+    for i, word in enumerate(content.split(" ")):
+        due = due or (i and i % words_per_page == 0)
+        # a hyphenated break waits for the next word long enough to split
+        split = (page + 1) % 2 == 0 and len(word) > 6 and word.isalpha()
+        if due and (split or (page + 1) % 2):
+            page, due = page + 1, False
+            marker = f"--- PAGE {page} ---"
+            if split:
+                paged.append(f"{word[:3]}-\n{marker}\n{word[3:]}")
+                plain.append(f"{word[:3]}-\n{word[3:]}")
+            else:
+                paged.append(f"\n{marker}\n{word}")
+                plain.append(f"\n{word}")
+            continue
+        paged.append(word)
+        plain.append(word)
+    return "--- PAGE 1 ---\n" + " ".join(paged), " ".join(plain)
+
+
+SHORT_SENTENCES = ["Introduction.", "Summary.", "Contents.", "12.", "Overview.", "Definitions."]
+
+
+def add_short_sentences(content, every=10):
+    """
+    Inserts a one-word sentence after every `every`-th sentence end, and a
+    short run of them (like a numeric table) after every fifth insertion.
+    """
+    out = []
+    ends = 0
+    for word in content.split(" "):
+        out.append(word)
+        if not word.endswith("."):
+            continue
+        ends += 1
+        if ends % every == 0:
+            n = ends // every
+            if n % 5 == 0:
+                out.extend(f"{7 * n + k}." for k in range(6))
+            else:
+                out.append(SHORT_SENTENCES[n % len(SHORT_SENTENCES)])
+    return " ".join(out)
+
+
+def best_time(fn, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def traced_peak(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def write_variant(folder, paths, transform):
+    os.makedirs(folder, exist_ok=True)
+    out = []
+    for p in paths:
+        with open(p, encoding="utf-8") as f:
+            text = transform(f.read())
+        out.append(os.path.join(folder, os.path.basename(p)))
+        with open(out[-1], "w", encoding="utf-8") as f:
+            f.write(text)
+    return out
+
+
+def compare_size(words, corpus, args):
+    from services.preview import merge_files
+    from chunks.semantic_chunker import create_smart_chunks
+
+    with tempfile.TemporaryDirectory(prefix="rag-chunk-bench-") as folder:
+        paths = write_corpus(folder, words, files=args.files, seed=args.seed)
+        if args.noise:
+            paths = write_variant(os.path.join(folder, "noisy"), paths, add_pdf_noise)
+
+        if corpus == "short":
+            paths = write_variant(os.path.join(folder, "short"), paths, add_short_sentences)
+
+        resp = merge_files(paths)
+        reference = resp["content"]
+        if corpus == "pdf":
+            paged = write_variant(os.path.join(folder, "paged"), paths, lambda t: add_page_markers(t)[0])
+            plain = write_variant(os.path.join(folder, "plain"), paths, lambda t: add_page_markers(t)[1])
+            resp = merge_files(paged)
+            reference = merge_files(plain)["content"]
+
+    content, files, segments = resp["content"], resp["files_merged"], resp["segments"]
+
+    legacy_s, legacy = best_time(lambda: legacy_create_smart_chunks(reference, files), args.repeat)
+    new_s, new = best_time(lambda: create_smart_chunks(content, files, segments), args.repeat)
+
+    legacy_peak = traced_peak(lambda: legacy_create_smart_chunks(reference, files))
+    new_peak = traced_peak(lambda: create_smart_chunks(content, files, segments))
+
+    same_text = sum(1 for a, b in zip(legacy, new) if a["text"] == b["text"])
+    same_tokens = sum(1 for a, b in zip(legacy, new) if a["tokens"] == b["tokens"])
+
+    return {
+        "size_words": words,
+        "corpus": corpus,
+        "files": len(files),
+        "legacy": {"chunks": len(legacy), "seconds": round(legacy_s, 4), "peak_kb": round(legacy_peak / 1024, 1)},
+        "spans": {"chunks": len(new), "seconds": round(new_s, 4), "peak_kb": round(new_peak / 1024, 1)},
+        "speedup": round(legacy_s / new_s, 3) if new_s else None,
+        "match": {
+            "same_chunk_count": len(legacy) == len(new),
+            "same_tokens": same_tokens,
+            "same_text": same_text,
+            "compared": min(len(legacy), len(new)),
+        },
+        "avg_files_cited": {
+            "legacy": round(sum(len(c["source_files"]) for c in legacy) / max(len(legacy), 1), 2),
+            "spans": round(sum(len(c["source_files"]) for c in new) / max(len(new), 1), 2),
+        },
+        "chunks_with_pages": sum(1 for c in new if c["page_start"] is not None),
+        "tokens_match_text": sum(1 for c in new if c["tokens"] == len(c["text"].split())),
+        "max_tokens": max((len(c["text"].split()) for c in new), default=0),
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Compare the span chunker with the previous implementation.")
+    ap.add_argument("--sizes", default="5000,20000,100000", help="comma separated corpus sizes in words")
+    ap.add_argument("--files", type=int, default=4)
+    ap.add_argument("--repeat", type=int, default=3, help="timing runs per implementation; best is kept")
+    ap.add_argument("--no-noise", dest="noise", action="store_false", help="skip PDF-style hyphenation noise")
+    ap.add_argument("--corpus", choices=("text", "pdf", "short", "all"), default="all",
+                    help="plain text, PDF-style pages with page markers, text with one-word sentences, or all three")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--output", help="write results JSON here")
+    args = ap.parse_args(argv)
+
+    import services.trace as trace
+    trace.TRACE_FILE = None
+
+    corpora = ("text", "pdf", "short") if args.corpus == "all" else (args.corpus,)
+    results = []
+    for words in sorted(int(s) for s in args.sizes.split(",") if s.strip()):
+        for corpus in corpora:
+            print(f"chunking {words} words ({corpus})...", file=sys.stderr)
+            results.append(compare_size(words, corpus, args))
+
+    print(f"{'words':>9} {'corpus':>6} {'chunks':>13} {'legacy s':>9} {'spans s':>9} {'speedup':>8} {'legacy KB':>10} {'spans KB':>9} {'same text':>10} {'files/chunk':>12} {'paged':>6} {'tok=text':>9} {'max tok':>8}")
+    for r in results:
+        m = r["match"]
+        print(
+            f"{r['size_words']:>9} {r['corpus']:>6} {r['legacy']['chunks']:>6}/{r['spans']['chunks']:<6} "
+            f"{r['legacy']['seconds']:>9.3f} {r['spans']['seconds']:>9.3f} {r['speedup'] or 0:>7.2f}x "
+            f"{r['legacy']['peak_kb']:>10.0f} {r['spans']['peak_kb']:>9.0f} "
+            f"{m['same_text']:>4}/{m['compared']:<5} "
+            f"{r['avg_files_cited']['legacy']:>5}->{r['avg_files_cited']['spans']:<5} "
+            f"{r['chunks_with_pages']:>6} {r['tokens_match_text']:>9} {r['max_tokens']:>8}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
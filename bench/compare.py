@@ -0,0 +1,90 @@
+# bench/compare.py
+"""
+Side-by-side diff of two bench.run result files, or of two bench.load
+reports (compared per concurrency level).
+
+    python -m bench.compare bench/results/abc123.json bench/results/def456.json
+    python -m bench.compare bench/results/load-abc123.json bench/results/load-def456.json
+"""
+import sys
+import json
+import argparse
+
+
+def _pct(old, new):
+    if not old:
+        return "   n/a"
+    return f"{(new - old) / old * 100:+6.1f}%"
+
+
+def compare(old, new):
+    old_by_size = {r["size_words"]: r for r in old["results"]}
+    rows = []
+    for r in new["results"]:
+        o = old_by_size.get(r["size_words"])
+        if o is None:
+            continue
+        metrics = [
+            ("ingest total s", o["ingest"]["total_s"], r["ingest"]["total_s"]),
+            ("query p50 ms", o["query"]["latency"]["p50_ms"], r["query"]["latency"]["p50_ms"]),
+            ("query p95 ms", o["query"]["latency"]["p95_ms"], r["query"]["latency"]["p95_ms"]),
+            ("peak rss MB", o.get("peak_rss_mb") or 0, r.get("peak_rss_mb") or 0),
+        ]
+        for stage, ms in r["ingest"]["stages_ms"].items():
+            metrics.append((f"ingest {stage} ms", o["ingest"]["stages_ms"].get(stage, 0), ms))
+        for stage, stats in r["query"]["stages"].items():
+            before = o["query"]["stages"].get(stage, {}).get("p50_ms", 0)
+            metrics.append((f"query {stage} p50 ms", before, stats["p50_ms"]))
+        for name, before, after in metrics:
+            rows.append((r["size_words"], name, before, after, _pct(before, after)))
+    return rows
+
+
+def compare_levels(old, new):
+    old_by_users = {r["users"]: r for r in old["levels"]}
+    rows = []
+    for r in new["levels"]:
+        o = old_by_users.get(r["users"])
+        if o is None:
+            continue
+        metrics = [
+            ("throughput q/s", o["throughput_qps"] or 0, r["throughput_qps"] or 0),
+            ("query p50 ms", o["query_latency"]["p50_ms"], r["query_latency"]["p50_ms"]),
+            ("query p95 ms", o["query_latency"]["p95_ms"], r["query_latency"]["p95_ms"]),
+            ("query p99 ms", o["query_latency"]["p99_ms"], r["query_latency"]["p99_ms"]),
+            ("ingest p95 ms", o["ingest_latency"]["p95_ms"], r["ingest_latency"]["p95_ms"]),
+            ("query error rate", o["query_error_rate"], r["query_error_rate"]),
+            ("ingest error rate", o["ingest_error_rate"], r["ingest_error_rate"]),
+            ("peak rss MB", o.get("peak_rss_mb") or 0, r.get("peak_rss_mb") or 0),
+        ]
+        for name, before, after in metrics:
+            rows.append((r["users"], name, before, after, _pct(before, after)))
+    return rows
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    ap.add_argument("old")
+    ap.add_argument("new")
+    args = ap.parse_args(argv)
+
+    with open(args.old, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+
+    if ("levels" in old) != ("levels" in new):
+        ap.error("cannot compare a bench.run result with a bench.load report")
+    if "levels" in new:
+        key, rows = "users", compare_levels(old, new)
+    else:
+        key, rows = "words", compare(old, new)
+
+    print(f"{old['commit']} -> {new['commit']}")
+    print(f"{key:>9}  {'metric':<34} {'old':>11} {'new':>11} {'change':>8}")
+    for group, name, before, after, change in rows:
+        print(f"{group:>9}  {name:<34} {before:>11.3f} {after:>11.3f} {change:>8}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+# bench/corpus.py
+"""
+Synthetic study material for benchmarks: seeded, so the same size always
+produces the same files, chunks and questions.
+"""
+import os
+import random
+
+TOPICS = [
+    "photosynthesis", "mitochondria", "plate tectonics", "the water cycle",
+    "supply and demand", "the french revolution", "newton's laws", "cell division",
+    "the immune system", "electric circuits", "volcanoes", "the roman empire",
+    "climate zones", "chemical bonding", "the nervous system", "probability",
+    "routing protocols", "the attention mechanism", "binary search trees", "ecosystems",
+]
+
+SUBJECTS = ["process", "theory", "system", "structure", "model", "cycle", "principle", "mechanism"]
+VERBS = ["explains", "controls", "describes", "depends on", "produces", "changes", "supports", "limits"]
+OBJECTS = [
+    "energy transfer", "the rate of change", "long term stability", "the final result",
+    "local conditions", "the main components", "observable patterns", "everyday examples",
+]
+CONNECTORS = ["In most textbooks,", "For the exam,", "Historically,", "In practice,", "As a rule,", "Notably,"]
+
+QUESTION_TEMPLATES = [
+    "What is {a}?",
+    "How does {a} work?",
+    "Explain {a} in simple words.",
+    "What is the difference between {a} and {b}?",
+    "Why is {a} important for the exam?",
+]
+
+
+def make_sentence(rng, topic):
+    words = [
+        rng.choice(CONNECTORS),
+        "the", rng.choice(SUBJECTS), "of", topic,
+        rng.choice(VERBS), rng.choice(OBJECTS),
+    ]
+    if rng.random() < 0.5:
+        words += ["and", rng.choice(VERBS), rng.choice(OBJECTS)]
+    return " ".join(words) + "."
+
+
+def make_document(rng, words):
+    """
+    Returns text of roughly `words` words, in paragraphs that each stay on
+    one topic so retrieval has something to find.
+    """
+    paragraphs = []
+    total = 0
+    while total < words:
+        topic = rng.choice(TOPICS)
+        sents = [make_sentence(rng, topic) for _ in range(rng.randint(3, 8))]
+        paragraph = " ".join(sents)
+        paragraphs.append(f"{topic.title()}\n{paragraph}")
+        total += len(paragraph.split())
+    return "\n\n".join(paragraphs)
+
+
+def write_corpus(folder, total_words, files=4, seed=0):
+    """
+    Writes `files` .txt files totalling about `total_words` words into
+    `folder` and returns their paths.
+    """
+    rng = random.Random(seed)
+    os.makedirs(folder, exist_ok=True)
+    per_file = max(1, total_words // files)
+
+    paths = []
+    for i in range(files):
+        path = os.path.join(folder, f"notes-{i:03d}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(make_document(rng, per_file))
+        paths.append(path)
+    return paths
+
+
+def make_questions(n, seed=0, multi=False):
+    """
+    Student questions about corpus topics. With multi=True each question has
+    two or three sentences, like the prompts app.py splits into sub-queries.
+    """
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        parts = 1 if not multi else rng.randint(2, 3)
+        qs = []
+        for _ in range(parts):
+            a, b = rng.sample(TOPICS, 2)
+            qs.append(rng.choice(QUESTION_TEMPLATES).format(a=a, b=b))
+        out.append(" ".join(qs))
+    return out
@@ -0,0 +1,366 @@
+# bench/fakes.py
+"""
+Deterministic local stand-ins for the OpenAI and Pinecone clients.
+
+They implement only the calls this project makes, with the same response
+shapes, and sleep for a configurable latency so stage timings look like the
+real services without any network access or API cost.
+"""
+import os
+import math
+import atexit
+import re
+import random
+import tempfile
+import threading
+import time
+import zlib
+from types import SimpleNamespace
+
+from pinecone.exceptions import NotFoundException
+
+FAKE_DIM = 256
+
+_WORD = re.compile(r"\w+")
+
+
+class Latency:
+    """
+    Seconds slept per fake call: a fixed base plus a per-item cost for batch
+    calls, with optional multiplicative jitter drawn from a seeded RNG.
+    """
+
+    def __init__(self, embed=0.05, embed_per_item=0.0005, chat=0.4, rerank=0.15,
+                 image=2.0, pinecone=0.02, jitter=0.0, scale=1.0, seed=0):
+        self.embed = embed
+        self.embed_per_item = embed_per_item
+        self.chat = chat
+        self.rerank = rerank
+        self.image = image
+        self.pinecone = pinecone
+        self.jitter = jitter
+        self.scale = scale
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sleep(self, seconds):
+        seconds *= self.scale
+        if self.jitter:
+            with self._lock:
+                seconds *= 1 + self._rng.uniform(-self.jitter, self.jitter)
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def to_dict(self):
+        return {
+            "embed": self.embed,
+            "embed_per_item": self.embed_per_item,
+            "chat": self.chat,
+            "rerank": self.rerank,
+            "image": self.image,
+            "pinecone": self.pinecone,
+            "jitter": self.jitter,
+            "scale": self.scale,
+        }
+
+
+LATENCY_SERVICES = {
+    "embed": "seconds per fake embeddings request",
+    "embed_per_item": "extra seconds per text in an embeddings request",
+    "chat": "seconds per fake chat completion",
+    "rerank": "seconds per fake rerank scoring call",
+    "image": "seconds per fake image generation",
+    "pinecone": "seconds per fake Pinecone request",
+}
+
+
+def add_latency_args(ap, jitter=0.0):
+    """
+    Adds --latency-scale, --jitter and one seconds flag per fake service
+    (--chat-latency etc.) to a benchmark's argument parser.
+    """
+    ap.add_argument("--latency-scale", type=float, default=1.0, help="multiplier on fake API latency, 0 disables sleeping")
+    ap.add_argument("--jitter", type=float, default=jitter, help="relative latency jitter, e.g. 0.2 for +/-20%%")
+    defaults = Latency()
+    for name, text in LATENCY_SERVICES.items():
+        flag = "--" + name.replace("_", "-") + "-latency"
+        ap.add_argument(flag, dest=f"{name}_latency", type=float, default=getattr(defaults, name),
+                        help=text + " (default %(default)s)")
+
+
+def latency_from_args(args):
+    return Latency(
+        jitter=args.jitter, scale=args.latency_scale, seed=args.seed,
+        **{name: getattr(args, f"{name}_latency") for name in LATENCY_SERVICES},
+    )
+
+
+def tokenize(text):
+    return _WORD.findall((text or "").lower())
+
+
+def hash_embedding(text, dim=FAKE_DIM):
+    """
+    Hashed bag-of-words vector, L2 normalised. Texts sharing words get a
+    positive cosine similarity, so retrieval over fakes still ranks sensibly.
+    """
+    vec = [0.0] * dim
+    for tok in tokenize(text):
+        h = zlib.crc32(tok.encode("utf-8"))
+        vec[h % dim] += 1.0 if (h >> 16) & 1 else -1.0
+    norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+    return [v / norm for v in vec]
+
+
+def _usage(prompt_tokens, completion_tokens=0):
+    return SimpleNamespace(
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        total_tokens=prompt_tokens + completion_tokens,
+    )
+
+
+# ---------------- OpenAI ----------------
+
+class _Embeddings:
+    def __init__(self, owner):
+        self._owner = owner
+
+    def create(self, model, input):
+        owner = self._owner
+        texts = [input] if isinstance(input, str) else list(input)
+        owner._maybe_fail()
+        owner.latency.sleep(owner.latency.embed + owner.latency.embed_per_item * len(texts))
+        data = [SimpleNamespace(embedding=hash_embedding(t, owner.dim), index=i) for i, t in enumerate(texts)]
+        tokens = sum(len(t.split()) for t in texts)
+        return SimpleNamespace(data=data, model=model, usage=_usage(tokens))
+
+
+class _Completions:
+    def __init__(self, owner):
+        self._owner = owner
+
+    def create(self, model, messages, temperature=None, **kwargs):
+        owner = self._owner
+        prompt = messages[-1]["content"]
+        owner._maybe_fail()
+
+        if "how relevant is this text" in prompt:
+            owner.latency.sleep(owner.latency.rerank)
+            content = f"{_relevance(prompt):.2f}"
+        else:
+            owner.latency.sleep(owner.latency.chat)
+            content = _answer(prompt)
+
+        message = SimpleNamespace(role="assistant", content=content)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(index=0, message=message, finish_reason="stop")],
+            model=model,
+            usage=_usage(len(prompt.split()), len(content.split())),
+        )
+
+
+class _Images:
+    def __init__(self, owner):
+        self._owner = owner
+
+    def generate(self, model, prompt, **kwargs):
+        owner = self._owner
+        owner._maybe_fail()
+        owner.latency.sleep(owner.latency.image)
+        key = zlib.crc32(prompt.encode("utf-8"))
+        return SimpleNamespace(data=[SimpleNamespace(url=f"https://fake-images.invalid/{key:08x}.png")])
+
+
+def _section(prompt, label, next_label):
+    start = prompt.find(label)
+    if start < 0:
+        return ""
+    start += len(label)
+    end = prompt.find(next_label, start) if next_label else -1
+    return prompt[start:end if end >= 0 else None].strip()
+
+
+def _relevance(prompt):
+    query = set(tokenize(_section(prompt, "Query:", "Text:")))
+    text = set(tokenize(_section(prompt, "Text:", "On a scale")))
+    if not query or not text:
+        return 0.0
+    return len(query & text) / len(query)
+
+
+def _answer(prompt):
+    context = _section(prompt, "CONTEXT:", None)
+    if not context:
+        return "I don't know based on the provided content."
+    first = context.split("\n\n")[0]
+    return "Here is what your notes say:\n\n- " + " ".join(first.split()[:60])
+
+
+class FakeOpenAI:
+    def __init__(self, latency=None, dim=FAKE_DIM, fail_rate=0.0, seed=0):
+        self.latency = latency or Latency()
+        self.dim = dim
+        self.fail_rate = fail_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.embeddings = _Embeddings(self)
+        self.chat = SimpleNamespace(completions=_Completions(self))
+        self.images = _Images(self)
+
+    def _maybe_fail(self):
+        if not self.fail_rate:
+            return
+        with self._lock:
+            roll = self._rng.random()
+        if roll < self.fail_rate:
+            raise RuntimeError("fake OpenAI error (injected)")
+
+
+# ---------------- Pinecone ----------------
+
+class _IndexList(list):
+    def names(self):
+        return [i.name for i in self]
+
+
+class _Namespace:
+    def __init__(self):
+        self.ids = []
+        self.positions = {}
+        self.values = []
+        self.metadata = []
+
+    def upsert(self, vid, values, metadata):
+        pos = self.positions.get(vid)
+        if pos is None:
+            self.positions[vid] = len(self.ids)
+            self.ids.append(vid)
+            self.values.append(values)
+            self.metadata.append(metadata)
+        else:
+            self.values[pos] = values
+            self.metadata[pos] = metadata
+
+
+class FakeIndex:
+    def __init__(self, name, latency):
+        self.name = name
+        self.latency = latency
+        self._namespaces = {}
+        self._lock = threading.Lock()
+
+    def upsert(self, vectors, namespace=""):
+        self.latency.sleep(self.latency.pinecone)
+        with self._lock:
+            ns = self._namespaces.setdefault(namespace, _Namespace())
+            for v in vectors:
+                ns.upsert(v["id"], v["values"], v.get("metadata") or {})
+        return {"upserted_count": len(vectors)}
+
+    def query(self, vector, namespace="", top_k=10, include_metadata=False, **kwargs):
+        self.latency.sleep(self.latency.pinecone)
+        with self._lock:
+            ns = self._namespaces.get(namespace)
+            rows = list(zip(ns.ids, ns.values, ns.metadata)) if ns else []
+
+        scored = [(sum(a * b for a, b in zip(vector, values)), vid, meta) for vid, values, meta in rows]
+        scored.sort(key=lambda x: x[0], reverse=True)
+        matches = [
+            SimpleNamespace(id=vid, score=score, metadata=meta if include_metadata else None)
+            for score, vid, meta in scored[:top_k]
+        ]
+        return SimpleNamespace(matches=matches, namespace=namespace)
+
+    def delete(self, ids=None, delete_all=False, namespace=""):
+        self.latency.sleep(self.latency.pinecone)
+        with self._lock:
+            if delete_all:
+                # serverless Pinecone answers 404 for a namespace that doesn't exist
+                if self._namespaces.pop(namespace, None) is None:
+                    raise NotFoundException(status=404, reason=f"Namespace not found: {namespace}")
+                return {}
+            ns = self._namespaces.get(namespace)
+            if ns is None or not ids:
+                return {}
+            drop = set(ids)
+            keep = [i for i, vid in enumerate(ns.ids) if vid not in drop]
+            fresh = _Namespace()
+            for i in keep:
+                fresh.upsert(ns.ids[i], ns.values[i], ns.metadata[i])
+            self._namespaces[namespace] = fresh
+        return {}
+
+    def describe_index_stats(self, **kwargs):
+        with self._lock:
+            namespaces = {name: {"vector_count": len(ns.ids)} for name, ns in self._namespaces.items()}
+        return {
+            "namespaces": namespaces,
+            "total_vector_count": sum(n["vector_count"] for n in namespaces.values()),
+        }
+
+
+class FakePinecone:
+    def __init__(self, latency=None):
+        self.latency = latency or Latency()
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def list_indexes(self):
+        self.latency.sleep(self.latency.pinecone)
+        with self._lock:
+            return _IndexList(SimpleNamespace(name=n) for n in self._indexes)
+
+    def create_index(self, name, dimension=None, metric="cosine", spec=None, **kwargs):
+        self.latency.sleep(self.latency.pinecone)
+        with self._lock:
+            self._indexes.setdefault(name, FakeIndex(name, self.latency))
+
+    def Index(self, name):
+        with self._lock:
+            return self._indexes[name]
+
+
+def _remove_registry(path):
+    for p in (path, path + "-wal", path + "-shm"):
+        try:
+            os.remove(p)
+        except OSError:
+            pass
+
+
+def install(latency=None, dim=FAKE_DIM, fail_rate=0.0, seed=0):
+    """
+    Swaps the module-level clients of every pipeline module for fakes.
+    Must run before the pipeline is used; returns (openai, pinecone) fakes.
+    """
+    # the real clients are still constructed at import time, so give them keys
+    os.environ.setdefault("OPENAI_API_KEY", "sk-fake-bench")
+    os.environ.setdefault("PINECONE_API_KEY", "fake-bench")
+    # benchmark runs get a throwaway study-set registry, never the real one
+    registry_path = os.path.join(tempfile.gettempdir(), f"rag-bench-registry-{os.getpid()}.db")
+    os.environ["RAG_REGISTRY_PATH"] = registry_path
+    atexit.register(_remove_registry, registry_path)
+
+    import embedding.preview_embedding as preview_embedding
+    import services.retrieve_chunks as retrieve_chunks
+    import services.store as store
+    import services.rerank as rerank
+    import services.generate as generate
+    import services.registry as registry
+
+    latency = latency or Latency()
+    openai = FakeOpenAI(latency, dim=dim, fail_rate=fail_rate, seed=seed)
+    pinecone = FakePinecone(latency)
+
+    preview_embedding.client = openai
+    retrieve_chunks.openai_client = openai
+    rerank.client = openai
+    generate.client = openai
+
+    retrieve_chunks.pc = pinecone
+    retrieve_chunks._index = None
+    store.pc = pinecone
+    registry.REGISTRY_PATH = registry_path
+
+    return openai, pinecone
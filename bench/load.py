@@ -0,0 +1,204 @@
+# bench/load.py
+"""
+Concurrent multi-user load generator.
+
+Each simulated user runs a realistic session against the pipeline functions
+the Streamlit app uses (services/pipeline.py): ingest their own study set,
+then ask several multi-sentence questions that get split into sub-queries.
+OpenAI and Pinecone are the fakes from bench/fakes.py. For each concurrency
+level it reports latency percentiles, throughput and error rates. Questions
+start once every user has ingested, so throughput covers the query phase
+only; questions of users whose ingest failed are counted as skipped.
+
+    python -m bench.load --users 1,2,4,8,16 --questions 5
+    python -m bench.compare bench/results/load-<old>.json bench/results/load-<new>.json
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from bench.fakes import install, add_latency_args, latency_from_args, FAKE_DIM
+from bench.corpus import write_corpus, make_questions
+from bench.stats import summarize, peak_rss_mb, git_commit
+from bench.run import RESULTS_DIR
+
+
+class SessionLog:
+    """
+    Thread-safe collector for one concurrency level.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.ingest = []
+        self.query = []
+        self.errors = {"ingest": 0, "query": 0}
+        self.error_kinds = {}
+        self.skipped = 0
+
+    def ok(self, kind, seconds):
+        with self._lock:
+            getattr(self, kind).append(seconds)
+
+    def skip(self, n):
+        with self._lock:
+            self.skipped += n
+
+    def failed(self, kind, exc):
+        name = type(exc).__name__
+        with self._lock:
+            self.errors[kind] += 1
+            self.error_kinds[name] = self.error_kinds.get(name, 0) + 1
+
+
+def user_session(user, level, args, log, folder, ingested):
+    """
+    One user: ingest, wait at `ingested` until every user has finished
+    ingesting, then ask the questions. A failed ingest skips its questions.
+    """
+    from services.pipeline import ingest_paths, answer_prompt
+    from services.trace import span
+
+    seed = args.seed + level * 1000 + user
+    upload_id = None
+    try:
+        paths = write_corpus(os.path.join(folder, f"user-{user}"), args.words, files=args.files, seed=seed)
+        t0 = time.perf_counter()
+        with span("ingest"):
+            upload_id = ingest_paths(paths, upload_id=f"load-{level}-{user}")["upload_id"]
+        log.ok("ingest", time.perf_counter() - t0)
+    except Exception as e:
+        log.failed("ingest", e)
+    ingested.wait()
+
+    if upload_id is None:
+        log.skip(args.questions)
+        return
+
+    for question in make_questions(args.questions, seed=seed, multi=True):
+        if args.think_time:
+            time.sleep(args.think_time)
+        t0 = time.perf_counter()
+        try:
+            with span("query"):
+                answer_prompt(question, upload_id, enable_image=args.image)
+        except Exception as e:
+            log.failed("query", e)
+            continue
+        log.ok("query", time.perf_counter() - t0)
+
+
+def run_level(users, args):
+    log = SessionLog()
+    # the query phase starts once every user is done ingesting, so throughput
+    # is answered questions over query time only
+    query_started = []
+    ingested = threading.Barrier(users, action=lambda: query_started.append(time.perf_counter()))
+
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix="rag-load-") as folder:
+        with ThreadPoolExecutor(max_workers=users) as pool:
+            futures = [pool.submit(user_session, u, users, args, log, folder, ingested) for u in range(users)]
+            for f in futures:
+                f.result()
+    finished = time.perf_counter()
+    query_wall = finished - query_started[0]
+
+    answered = len(log.query)
+    asked = answered + log.errors["query"]
+    return {
+        "users": users,
+        "wall_s": round(finished - started, 3),
+        "ingest_wall_s": round(query_started[0] - started, 3),
+        "query_wall_s": round(query_wall, 3),
+        "questions_attempted": asked,
+        "questions_answered": answered,
+        "questions_skipped": log.skipped,
+        "throughput_qps": round(answered / query_wall, 3) if query_wall else None,
+        "query_latency": summarize(log.query),
+        "ingest_latency": summarize(log.ingest),
+        "errors": dict(log.errors),
+        "error_kinds": dict(log.error_kinds),
+        "query_error_rate": round(log.errors["query"] / asked, 4) if asked else 0.0,
+        "ingest_error_rate": round(log.errors["ingest"] / users, 4),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def print_summary(levels):
+    print(f"{'users':>6} {'q/s':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ingest p95':>11} {'err %':>6} {'skipped':>8}")
+    base_p95 = levels[0]["query_latency"]["p95_ms"] if levels else 0
+    for r in levels:
+        lat = r["query_latency"]
+        flag = "  <- p95 more than 2x single-user" if base_p95 and lat["p95_ms"] > 2 * base_p95 else ""
+        print(
+            f"{r['users']:>6} {r['throughput_qps'] or 0:>7.2f} {lat['p50_ms']:>9.1f} {lat['p95_ms']:>9.1f} "
+            f"{lat['p99_ms']:>9.1f} {r['ingest_latency']['p95_ms']:>11.1f} {r['query_error_rate'] * 100:>6.1f} "
+            f"{r['questions_skipped']:>8}{flag}"
+        )
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Concurrent multi-user load test with fake OpenAI/Pinecone.")
+    ap.add_argument("--users", default="1,2,4,8,16", help="comma separated concurrency levels")
+    ap.add_argument("--questions", type=int, default=5, help="questions per user session")
+    ap.add_argument("--words", type=int, default=3000, help="words in each user's study set")
+    ap.add_argument("--files", type=int, default=2, help="files in each user's study set")
+    ap.add_argument("--think-time", type=float, default=0.0, help="seconds a user waits before each question")
+    ap.add_argument("--fail-rate", type=float, default=0.0, help="probability that a fake OpenAI call raises")
+    ap.add_argument("--dim", type=int, default=FAKE_DIM, help="fake embedding dimension")
+    ap.add_argument("--no-image", dest="image", action="store_false", help="skip fake image generation")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--output", help="results JSON path (default bench/results/load-<commit>.json)")
+    add_latency_args(ap, jitter=0.2)
+    args = ap.parse_args(argv)
+
+    latency = latency_from_args(args)
+    install(latency, dim=args.dim, fail_rate=args.fail_rate, seed=args.seed)
+
+    import services.trace as trace
+    trace.TRACE_FILE = None
+
+    levels = []
+    for users in sorted(int(u) for u in args.users.split(",") if u.strip()):
+        print(f"running {users} concurrent user(s)...", file=sys.stderr)
+        levels.append(run_level(users, args))
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "timestamp": round(time.time(), 3),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "questions": args.questions,
+            "words": args.words,
+            "files": args.files,
+            "think_time": args.think_time,
+            "fail_rate": args.fail_rate,
+            "image": args.image,
+            "dim": args.dim,
+            "seed": args.seed,
+            "latency": latency.to_dict(),
+        },
+        "levels": levels,
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, f"load-{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print_summary(levels)
+    print(f"results written to {output}", file=sys.stderr)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+# bench/run.py
+"""
+Offline end-to-end benchmark.
+
+Runs ingest (merge_files -> create_smart_chunks -> embed_sentences ->
+store_chunks) and query (retrieve_chunks -> hybrid_rag) over synthetic
+corpora of several sizes, with OpenAI and Pinecone replaced by the fakes in
+bench/fakes.py, and writes per-stage latency, throughput and peak RSS to JSON.
+
+ru_maxrss only ever grows, so with several sizes each one runs in its own
+child process and peak_rss_mb is the peak of that size alone.
+
+    python -m bench.run --sizes 2000,20000,100000 --queries 20
+    python -m bench.compare bench/results/<old>.json bench/results/<new>.json
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import subprocess
+from uuid import uuid4
+
+from bench.fakes import install, add_latency_args, latency_from_args, FAKE_DIM
+from bench.corpus import write_corpus, make_questions
+from bench.stats import summarize, peak_rss_mb, git_commit
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def stage_durations(roots):
+    """
+    Groups span durations (seconds) by stage name across several span trees.
+    """
+    by_stage = {}
+
+    def walk(s):
+        by_stage.setdefault(s.name, []).append(s.duration)
+        for c in s.children:
+            walk(c)
+
+    for r in roots:
+        walk(r)
+    return by_stage
+
+
+def run_size(words, args):
+    from services.preview import merge_files
+    from chunks.semantic_chunker import create_smart_chunks
+    from embedding.preview_embedding import embed_sentences
+    from services.store import store_chunks
+    from services.retrieve_chunks import retrieve_chunks
+    from services.hybrid import hybrid_rag
+    from services.trace import span
+
+    with tempfile.TemporaryDirectory(prefix="rag-bench-") as folder:
+        paths = write_corpus(folder, words, files=args.files, seed=args.seed)
+        upload_id = f"bench-{words}-{uuid4().hex[:8]}"
+
+        with span("ingest") as ingest:
+            resp = merge_files(paths)
+            chunks = create_smart_chunks(resp["content"], resp["files_merged"], resp["segments"])
+            vectors = embed_sentences([c["text"] for c in chunks])
+            store_chunks(upload_id, resp["name"], chunks, vectors)
+
+    query_roots = []
+    for q in make_questions(args.queries, seed=args.seed):
+        with span("query") as root:
+            dense = retrieve_chunks(q, upload_id, limit=15, threshold=0.1)
+            hybrid_rag(q, dense, final_top_k=10, enable_image=args.image)
+        query_roots.append(root)
+
+    query_total = sum(r.duration for r in query_roots)
+
+    return {
+        "size_words": words,
+        "files": args.files,
+        "chunks": len(chunks),
+        "ingest": {
+            "total_s": round(ingest.duration, 4),
+            "stages_ms": {c.name: round(c.duration * 1000, 3) for c in ingest.children},
+            "words_per_s": round(words / ingest.duration, 1) if ingest.duration else None,
+            "chunks_per_s": round(len(chunks) / ingest.duration, 1) if ingest.duration else None,
+            "api_calls": ingest.total("api_calls"),
+        },
+        "query": {
+            "count": len(query_roots),
+            "queries_per_s": round(len(query_roots) / query_total, 3) if query_total else None,
+            "latency": summarize([r.duration for r in query_roots]),
+            "stages": {
+                name: summarize(durations)
+                for name, durations in sorted(stage_durations(query_roots).items())
+                if name != "query"
+            },
+            "api_calls": sum(r.total("api_calls") for r in query_roots),
+            "input_tokens": sum(r.total("input_tokens") for r in query_roots),
+            "output_tokens": sum(r.total("output_tokens") for r in query_roots),
+        },
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_size_isolated(words, argv):
+    """
+    Runs one size in a fresh interpreter (same flags, this size only) and
+    returns its result, so peak RSS is not carried over from larger sizes.
+    """
+    fd, output = tempfile.mkstemp(prefix="rag-bench-size-", suffix=".json")
+    os.close(fd)
+    try:
+        subprocess.run(
+            [sys.executable, "-m", "bench.run", *argv, "--sizes", str(words), "--output", output, "--child"],
+            check=True, stdout=subprocess.DEVNULL,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        )
+        with open(output, encoding="utf-8") as f:
+            return json.load(f)["results"][0]
+    finally:
+        os.remove(output)
+
+
+def print_summary(results):
+    print(f"{'words':>9} {'chunks':>7} {'ingest s':>9} {'chunk ms':>9} {'q p50 ms':>9} {'q p95 ms':>9} {'q/s':>7} {'rss MB':>7}")
+    for r in results:
+        print(
+            f"{r['size_words']:>9} {r['chunks']:>7} {r['ingest']['total_s']:>9.3f} "
+            f"{r['ingest']['stages_ms'].get('create_smart_chunks', 0):>9.1f} "
+            f"{r['query']['latency']['p50_ms']:>9.1f} {r['query']['latency']['p95_ms']:>9.1f} "
+            f"{r['query']['queries_per_s'] or 0:>7.2f} {r['peak_rss_mb'] or 0:>7.1f}"
+        )
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Offline RAG pipeline benchmark with fake OpenAI/Pinecone.")
+    ap.add_argument("--sizes", default="2000,20000,100000", help="comma separated corpus sizes in words")
+    ap.add_argument("--files", type=int, default=4, help="files per corpus")
+    ap.add_argument("--queries", type=int, default=20, help="questions per corpus size")
+    ap.add_argument("--dim", type=int, default=FAKE_DIM, help="fake embedding dimension")
+    ap.add_argument("--no-image", dest="image", action="store_false", help="skip fake image generation")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--output", help="results JSON path (default bench/results/<commit>.json)")
+    ap.add_argument("--trace-file", default=None, help="also append raw spans to this JSONL file")
+    # set by run_size_isolated: the parent collects the output file and reports
+    ap.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    add_latency_args(ap)
+    argv = sys.argv[1:] if argv is None else list(argv)
+    args = ap.parse_args(argv)
+    sizes = sorted(int(s) for s in args.sizes.split(",") if s.strip())
+
+    latency = latency_from_args(args)
+    install(latency, dim=args.dim, seed=args.seed)
+
+    import services.trace as trace
+    trace.TRACE_FILE = args.trace_file
+    trace.reset_metrics()
+
+    results = []
+    started = time.time()
+    for words in sizes:
+        if len(sizes) > 1:
+            results.append(run_size_isolated(words, argv))
+            continue
+        print(f"benchmarking {words} words...", file=sys.stderr)
+        results.append(run_size(words, args))
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "timestamp": round(started, 3),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "files": args.files,
+            "queries": args.queries,
+            "dim": args.dim,
+            "image": args.image,
+            "seed": args.seed,
+            "latency": latency.to_dict(),
+        },
+        "results": results,
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    if not args.child:
+        print_summary(results)
+        print(f"results written to {output}", file=sys.stderr)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,9 @@
 # chunks/semantic_chunker.py
 import spacy
 import re
+from array import array
+from bisect import bisect_right
+from services.trace import traced, count
 
 try:
     nlp = spacy.load("en_core_web_sm")
@@ -8,8 +11,22 @@ except:
     import en_core_web_sm
     nlp = en_core_web_sm.load()
 
-MAX_TOKENS = 300      
-OVERLAP_TOKENS = 80   
+MAX_TOKENS = 300
+OVERLAP_TOKENS = 80
+
+# Sentence boundaries come from the parser, which reads tok2vec only; the
+# tagger (and attribute_ruler/lemmatizer built on it) and ner add nothing.
+SENT_DISABLE = [p for p in ("tagger", "attribute_ruler", "lemmatizer", "ner") if p in nlp.pipe_names]
+
+# \b anchors give the same matches as before (a match always starts a word)
+# without retrying the greedy \w+ from every position inside a word.
+HYPHEN_NEWLINE_RE = re.compile(r'\b(\w+)-\n(\w+)')
+HYPHEN_SPACE_RE = re.compile(r'\b(\w+)-\s+(\w+)')
+WHITESPACE_RE = re.compile(r'\s+')
+PAGE_MARKER_RE = re.compile(r'--- PAGE (\d+) ---')
+# a word hyphenated across a page break: "mecha-" ends one page, "nism" starts the next
+PAGE_TAIL_HYPHEN_RE = re.compile(r'\b(\w+)-\s*$')
+PAGE_HEAD_WORD_RE = re.compile(r'\s*(\w+)')
 
 def count_tokens(text: str):
     """
@@ -23,74 +40,164 @@ def clean_text(text: str) -> str:
     """
     if not text:
         return ""
-    
-    text = re.sub(r'(\w+)-\n(\w+)', r'\1\2', text)
-    text = re.sub(r'(\w+)-\s+(\w+)', r'\1\2', text)
-    text = re.sub(r'\s+', ' ', text)
-    text = re.sub(r'--- PAGE \d+ ---', '', text)
-    
+
+    text = HYPHEN_NEWLINE_RE.sub(r'\1\2', text)
+    text = HYPHEN_SPACE_RE.sub(r'\1\2', text)
+    text = WHITESPACE_RE.sub(' ', text)
+    text = PAGE_MARKER_RE.sub('', text)
+
     return text.strip()
 
-def create_smart_chunks(content: str, source_files: list):
+def clean_segments(content: str, segments: list):
     """
-    Splits text into clean, sliding windows of sentences.
+    Cleans each file (and each page inside it) separately and joins them with
+    single spaces. Returns the cleaned text and a list of
+    (start_offset, filename, page) boundaries into it, sorted by offset.
+
+    A word hyphenated across a page break is joined first and kept on the
+    page where it starts, as clean_text would have joined it without the marker.
     """
-    cleaned_content = clean_text(content)
-    
-    nlp.max_length = len(cleaned_content) + 100000
-    doc = nlp(cleaned_content)
-    
-    sentences = [s.text.strip() for s in doc.sents if s.text.strip()]
+    pieces = []
+    boundaries = []
+    offset = 0
 
-    chunks = []
-    chunk_index = 0
-    
-    current_chunk_sents = []
-    current_length = 0
-    
-    for sentence in sentences:
-        sent_len = count_tokens(sentence)
-        
+    for seg in segments:
+        raw = content[seg["start"]:seg["end"]]
+
+        pages = []
+        last_end, page = 0, None
+        for m in PAGE_MARKER_RE.finditer(raw):
+            pages.append([page, raw[last_end:m.start()]])
+            last_end, page = m.end(), int(m.group(1))
+        pages.append([page, raw[last_end:]])
+
+        for prev, nxt in zip(pages, pages[1:]):
+            tail = PAGE_TAIL_HYPHEN_RE.search(prev[1])
+            head = PAGE_HEAD_WORD_RE.match(nxt[1]) if tail else None
+            if head:
+                prev[1] = prev[1][:tail.start()] + tail.group(1) + head.group(1)
+                nxt[1] = nxt[1][head.end():]
+
+        for page, text in pages:
+            cleaned = clean_text(text)
+            if not cleaned:
+                continue
+            if pieces:
+                offset += 1
+            boundaries.append((offset, seg["filename"], page))
+            pieces.append(cleaned)
+            offset += len(cleaned)
+
+    return " ".join(pieces), boundaries
+
+def sentence_bounds(text: str):
+    """
+    Character spans and whitespace token counts of every sentence with at
+    least two tokens, as parallel arrays. Counted once, never re-split.
+    """
+    nlp.max_length = len(text) + 100000
+    doc = nlp(text, disable=SENT_DISABLE)
+
+    starts, ends, lengths = array('l'), array('l'), array('l')
+    for s in doc.sents:
+        start, end = s.start_char, s.end_char
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if start == end:
+            continue
+
+        # cleaned text has exactly one space between tokens
+        sent_len = text.count(" ", start, end) + 1
         if sent_len < 2:
             continue
 
-        if current_length + sent_len > MAX_TOKENS and current_chunk_sents:
-            
-            text_block = " ".join(current_chunk_sents)
-            chunks.append({
-                "chunk_index": chunk_index,
-                "text": text_block,
-                "tokens": current_length,
-                "source_files": source_files
-            })
-            chunk_index += 1
-            
-            overlap_buffer = []
-            overlap_len = 0
-            
-            for old_sent in reversed(current_chunk_sents):
-                old_len = count_tokens(old_sent)
-                if overlap_len + old_len < OVERLAP_TOKENS:
-                    overlap_buffer.insert(0, old_sent)
-                    overlap_len += old_len
-                else:
-                    break
-            
-            current_chunk_sents = overlap_buffer
-            current_length = overlap_len
-
-        current_chunk_sents.append(sentence)
-        current_length += sent_len
-
-    if current_chunk_sents:
+        starts.append(start)
+        ends.append(end)
+        lengths.append(sent_len)
+
+    return starts, ends, lengths
+
+def chunk_windows(lengths, max_tokens=MAX_TOKENS, overlap_tokens=OVERLAP_TOKENS):
+    """
+    Sliding windows over sentence indices as (first, stop, tokens) tuples.
+
+    A window closes before the sentence that would push it past max_tokens;
+    the next one starts with the longest tail of it that stays under
+    overlap_tokens. Sums come from a prefix-sum array, the overlap start
+    from a binary search over it.
+    """
+    n = len(lengths)
+    prefix = array('l', [0]) * (n + 1)
+    for i in range(n):
+        prefix[i + 1] = prefix[i] + lengths[i]
+
+    windows = []
+    first = 0
+    for i in range(n):
+        if i > first and prefix[i + 1] - prefix[first] > max_tokens:
+            windows.append((first, i, prefix[i] - prefix[first]))
+            # smallest j with prefix[i] - prefix[j] < overlap_tokens
+            first = bisect_right(prefix, prefix[i] - overlap_tokens, first, i + 1)
+
+    if n > first:
+        windows.append((first, n, prefix[n] - prefix[first]))
+
+    return windows
+
+def span_provenance(start, end, boundaries, boundary_starts):
+    """
+    Files, and the page range within them, that the span [start, end) overlaps.
+    """
+    lo = max(bisect_right(boundary_starts, start) - 1, 0)
+    hi = max(bisect_right(boundary_starts, end - 1) - 1, 0)
+
+    files = []
+    for _, filename, _ in boundaries[lo:hi + 1]:
+        if filename not in files:
+            files.append(filename)
+
+    # a page range is only meaningful inside a single file
+    if len(files) > 1:
+        return files, None, None
+    return files, boundaries[lo][2], boundaries[hi][2]
+
+@traced("create_smart_chunks")
+def create_smart_chunks(content: str, source_files: list, segments: list = None):
+    """
+    Splits text into clean, sliding windows of sentences.
+
+    `segments` are the per-file {filename, start, end} offsets from
+    merge_files; with them every chunk records only the file(s) and pages it
+    came from. Without them the whole content is attributed to `source_files`.
+    """
+    if segments is None:
+        segments = [{"filename": None, "start": 0, "end": len(content)}]
+
+    cleaned_content, boundaries = clean_segments(content, segments)
+    if not cleaned_content:
+        return []
+    boundary_starts = [b[0] for b in boundaries]
+
+    starts, ends, lengths = sentence_bounds(cleaned_content)
+
+    chunks = []
+    for chunk_index, (first, stop, tokens) in enumerate(chunk_windows(lengths)):
+        files, page_start, page_end = span_provenance(starts[first], ends[stop - 1], boundaries, boundary_starts)
         chunks.append({
             "chunk_index": chunk_index,
-            "text": " ".join(current_chunk_sents),
-            "tokens": current_length,
-            "source_files": source_files
+            # only the counted sentences: one-word ones between them are left
+            # out of the text just as they are left out of `tokens`
+            "text": " ".join(cleaned_content[starts[k]:ends[k]] for k in range(first, stop)),
+            "tokens": tokens,
+            "source_files": source_files if files == [None] else files,
+            "page_start": page_start,
+            "page_end": page_end,
         })
 
+    count("candidates_out", len(chunks))
     return chunks
 
-def split_sentences(content): return [] 
-def cluster_sentences(s, v, f): return []
\ No newline at end of file
+def split_sentences(content): return []
+def cluster_sentences(s, v, f): return []
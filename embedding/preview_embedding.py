@@ -2,13 +2,17 @@
 import os
 from dotenv import load_dotenv
 from openai import OpenAI
+from services.trace import traced, count, record_api_call
 load_dotenv()
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 client = OpenAI(api_key=OPENAI_API_KEY)
 MODEL = "text-embedding-3-large"
 
+@traced("embed_sentences")
 def embed_sentences(sentences):
     inputs = [f"passage: {s}" for s in sentences]
+    count("candidates_in", len(inputs))
     resp = client.embeddings.create(model=MODEL, input=inputs)
+    record_api_call(resp)
     return [v.embedding for v in resp.data]
@@ -35,7 +35,14 @@ def parse_pdf(path: str) -> str:
             )
             
             all_text = []
+            current_page = None
             for el in elements:
+                # Page markers let the chunker cite pages; clean_text strips them
+                page = getattr(el.metadata, "page_number", None)
+                if page is not None and page != current_page:
+                    all_text.append(f"--- PAGE {page} ---")
+                    current_page = page
+
                 # If it's a table, prefer the HTML representation for better LLM understanding
                 if el.category == "Table" and el.metadata.text_as_html:
                     all_text.append(f"\n[TABLE]\n{el.metadata.text_as_html}\n[/TABLE]\n")
@@ -51,10 +58,10 @@ def parse_pdf(path: str) -> str:
     # Fallback / Standard implementation
     doc = fitz.open(path)
     all_text = []
-    for page in doc:
+    for page_no, page in enumerate(doc, start=1):
         txt = page.get_text()
         if txt:
-            all_text.append(txt)
+            all_text.append(f"--- PAGE {page_no} ---\n{txt}")
     doc.close()
     return "\n".join(all_text)
 
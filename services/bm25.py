@@ -1,10 +1,14 @@
 # services/bm25.py
 from rank_bm25 import BM25Okapi
+from services.trace import traced, count
 
+@traced("bm25_search")
 def bm25_search(query, chunks, top_k=8):
     if not chunks:
         return []
 
+    count("candidates_in", len(chunks))
+
     corpus = [c["text"] for c in chunks]
     tokenized = [d.split() for d in corpus]
     bm25 = BM25Okapi(tokenized)
@@ -18,4 +22,5 @@ def bm25_search(query, chunks, top_k=8):
         c["bm25_score"] = float(s)
         out.append(c)
 
+    count("candidates_out", len(out))
     return out
@@ -1,11 +1,23 @@
 import os
 from openai import OpenAI
+from services.trace import traced, count, record_api_call
 
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 GEN_MODEL = "gpt-4o"
 IMAGE_MODEL = "dall-e-3"
 
+# answer for a question with nothing to go on; copy it with dict() before returning
+NOT_FOUND_ANSWER = "I looked through your notes, but I couldn't find anything about those topics. 🤷‍♂️"
+NOT_FOUND_RESPONSE = {
+    "answer": NOT_FOUND_ANSWER,
+    "citations": [],
+    "sources": [],
+    "confidence": 0.0,
+    "image_url": None
+}
+
+@traced("generate_image")
 def generate_image(query):
     """
     Generates a simple educational illustration.
@@ -24,25 +36,24 @@ def generate_image(query):
             quality="standard",
             n=1,
         )
+        record_api_call(response)
         return response.data[0].url
     except Exception as e:
+        count("errors")
         print(f"Image Gen Error: {e}")
         return None
 
+@traced("generate_answer")
 def generate_answer(query, ranked_chunks, top_k=5, create_visual=False):
     """
-    Returns dict: {answer, citations, confidence, image_url}
+    Returns dict: {answer, citations, sources, confidence, image_url}
     """
     
     if not ranked_chunks:
-        return {
-            "answer": "I don't know based on the provided content. 😕",
-            "citations": [],
-            "confidence": 0.0,
-            "image_url": None
-        }
+        return dict(NOT_FOUND_RESPONSE)
 
     selected = ranked_chunks[:top_k]
+    count("candidates_in", len(selected))
     context = "\n\n".join(f"[{c['chunk_index']}] {c['text']}" for c in selected)
 
     # Student-Friendly Prompt
@@ -69,6 +80,7 @@ CONTEXT:
         messages=[{"role": "user", "content": prompt}],
         temperature=0.0,
     )
+    record_api_call(resp)
 
     answer = resp.choices[0].message.content.strip()
 
@@ -82,10 +94,20 @@ CONTEXT:
 
     conf = sum(c.get("rerank_score", 0) for c in selected) / len(selected) if selected else 0
     citations = [c["chunk_index"] for c in selected]
+    sources = [
+        {
+            "chunk_index": c["chunk_index"],
+            "source_files": c.get("source_files") or [],
+            "page_start": c.get("page_start"),
+            "page_end": c.get("page_end"),
+        }
+        for c in selected
+    ]
 
     return {
         "answer": answer,
         "citations": citations,
+        "sources": sources,
         "confidence": round(conf, 3),
         "image_url": image_url
     }
\ No newline at end of file
@@ -3,20 +3,13 @@
 from services.bm25 import bm25_search
 from services.rrf import rrf_fuse
 from services.rerank import rerank
-from services.generate import generate_answer
+from services.generate import generate_answer, NOT_FOUND_RESPONSE
+from services.trace import traced
 
-def hybrid_rag(query, dense_chunks, sparse_top_k=10, final_top_k=5, enable_image=False):
+def fuse_and_rerank(query, dense_chunks, sparse_top_k=10):
     """
-    Added 'enable_image' parameter to control DALL-E generation.
+    BM25 over the dense candidates, RRF fusion of both rankings, then LLM rerank.
     """
-    if not dense_chunks:
-        return {
-            "answer": "I don't know based on the provided context.",
-            "citations": [],
-            "confidence": 0.0,
-            "image_url": None
-        }
-
     sparse = bm25_search(query, dense_chunks, top_k=sparse_top_k)
 
     fused = rrf_fuse(dense_chunks, sparse)
@@ -24,7 +17,25 @@ def hybrid_rag(query, dense_chunks, sparse_top_k=10, final_top_k=5, enable_image
     idx_lookup = {c["chunk_index"]: c for c in dense_chunks + sparse}
     fused_chunks = [idx_lookup[c["chunk_index"]] for c in fused]
 
-    reranked = rerank(query, fused_chunks)
+    return rerank(query, fused_chunks)
+
+@traced("hybrid_rag")
+def hybrid_rag(query, dense_chunks, sparse_top_k=10, final_top_k=5, enable_image=False, on_stage=None):
+    """
+    Added 'enable_image' parameter to control DALL-E generation.
+    `on_stage(event, data)` is told the reranked chunks before generation starts.
+    """
+    if not dense_chunks:
+        return dict(NOT_FOUND_RESPONSE)
+
+    reranked = fuse_and_rerank(query, dense_chunks, sparse_top_k=sparse_top_k)
     final_chunks = reranked[:final_top_k]
+    if on_stage:
+        on_stage("reranked", {
+            "chunks": [
+                {"chunk_index": c["chunk_index"], "rerank_score": c.get("rerank_score", 0.0)}
+                for c in final_chunks
+            ]
+        })
 
-    return generate_answer(query, final_chunks, create_visual=enable_image)
\ No newline at end of file
+    return generate_answer(query, final_chunks, create_visual=enable_image)
@@ -0,0 +1,186 @@
+# services/pipeline.py
+import re
+import asyncio
+from uuid import uuid4
+from concurrent.futures import ThreadPoolExecutor
+
+from services.preview import merge_files
+from chunks.semantic_chunker import create_smart_chunks
+from embedding.preview_embedding import embed_sentences
+from services.store import store_chunks
+from services.hybrid import hybrid_rag
+from services.retrieve_chunks import retrieve_chunks
+from services.generate import NOT_FOUND_RESPONSE
+from services import registry
+from services.trace import traced, count, current_span, start_span, end_span, activate
+
+# sub-questions of one prompt retrieved in parallel
+SUB_QUERY_WORKERS = 4
+
+LOW_CONFIDENCE_NOTE = "\n\n> 🧐 *I'm not 100% sure, so please double-check your textbooks!*"
+
+def ingest_paths(paths, upload_id=None, on_step=None):
+    """
+    Reads, chunks, embeds and stores a study set. `on_step` receives a short
+    progress message before each stage (the Streamlit UI passes st.write).
+    Raises registry.StudySetTooLarge if the set alone is larger than the index budget.
+    """
+    step = on_step or (lambda msg: None)
+    upload_id = upload_id or str(uuid4())
+
+    step("📖 Reading files...")
+    resp = merge_files(paths)
+
+    step("✂️ Creating smart study chunks...")
+    chunks = create_smart_chunks(resp["content"], resp["files_merged"], resp["segments"])
+    # refuse before paying for embeddings
+    if len(chunks) > registry.INDEX_BUDGET_CHUNKS:
+        raise registry.StudySetTooLarge(
+            f"This study set has {len(chunks)} chunks, more than the index can hold "
+            f"({registry.INDEX_BUDGET_CHUNKS}). Try uploading fewer files."
+        )
+
+    step("🧠 Memorizing content...")
+    text_list = [c["text"] for c in chunks]
+    vectors = embed_sentences(text_list)
+
+    step("💾 Saving to Brain (Database)...")
+    sp = current_span()
+    if sp is not None:
+        sp.set(upload_id=upload_id, files=len(resp["files_merged"]))
+    store_chunks(upload_id, resp["name"], chunks, vectors)
+    registry.register(upload_id, resp["name"], len(chunks), len(resp["files_merged"]))
+
+    return {
+        "upload_id": upload_id,
+        "name": resp["name"],
+        "files": resp["files_merged"],
+        "total_chunks": len(chunks),
+    }
+
+def split_sub_queries(prompt):
+    """
+    Splits a multi-question prompt into individual sentences/questions.
+    Falls back to the full prompt when nothing long enough is found.
+    """
+    sub_queries = re.split(r'(?<=[.?!])\s+', prompt)
+    sub_queries = [q.strip() for q in sub_queries if len(q.strip()) > 5]
+    return sub_queries or [prompt]
+
+@traced("retrieve_for_prompt")
+def retrieve_for_prompt(prompt, upload_id, limit=15, threshold=0.1, on_stage=None):
+    """
+    Retrieves chunks for each sub-question concurrently and merges them,
+    deduplicated on chunk_index.
+    """
+    sub_queries = split_sub_queries(prompt)
+    count("sub_queries", len(sub_queries))
+    if on_stage:
+        on_stage("sub_queries", {"sub_queries": sub_queries})
+
+    sp = current_span()
+    with ThreadPoolExecutor(max_workers=min(SUB_QUERY_WORKERS, len(sub_queries))) as pool:
+        all_combined_results = merge_retrieved(pool.map(
+            lambda q: _run_under(sp, retrieve_chunks, q, upload_id, limit=limit, threshold=threshold),
+            sub_queries,
+        ))
+
+    count("candidates_out", len(all_combined_results))
+    return all_combined_results
+
+def answer_prompt(prompt, upload_id, enable_image=False, final_top_k=10, on_stage=None):
+    """
+    Full question path, shared by the chat UI and the HTTP API. Returns dict:
+    {answer, image_url, confidence, citations, sources}. `on_stage(event, data)`
+    hears about each stage as it finishes (stream_answer turns these into events).
+    Raises registry.StudySetNotFound if the set is unknown or was evicted.
+    """
+    emit = on_stage or (lambda event, data: None)
+    # an evicted set would otherwise just answer "not found" to everything
+    if registry.get(upload_id) is None:
+        raise registry.StudySetNotFound(upload_id)
+    registry.touch(upload_id)
+    dense_chunks = retrieve_for_prompt(prompt, upload_id, on_stage=emit)
+    emit("retrieved", {"chunks": len(dense_chunks)})
+
+    if not dense_chunks:
+        return dict(NOT_FOUND_RESPONSE)
+
+    # Use the combined chunks for the final RAG generation
+    rag_response = hybrid_rag(
+        query=prompt,
+        dense_chunks=dense_chunks,
+        final_top_k=final_top_k, # Increased k to handle multiple topics
+        enable_image=enable_image,
+        on_stage=emit
+    )
+
+    return with_confidence_note(rag_response)
+
+def with_confidence_note(rag_response):
+    answer = rag_response["answer"]
+    if rag_response["confidence"] < 0.35 and "I don't know" not in answer:
+        answer += LOW_CONFIDENCE_NOTE
+    return {**rag_response, "answer": answer}
+
+def merge_retrieved(part_results_list):
+    """
+    Flattens per-sub-query results in order, keeping the first hit per chunk_index.
+    """
+    merged = []
+    seen_chunk_ids = set()
+    for part_results in part_results_list:
+        for res in part_results:
+            if res["chunk_index"] not in seen_chunk_ids:
+                merged.append(res)
+                seen_chunk_ids.add(res["chunk_index"])
+    return merged
+
+def _run_under(sp, fn, *args, **kwargs):
+    with activate(sp):
+        return fn(*args, **kwargs)
+
+async def stream_answer(prompt, upload_id, enable_image=False, final_top_k=10):
+    """
+    Async version of answer_prompt for the HTTP API. Runs the same stages in
+    a worker thread and yields their (event, data) pairs as they finish; the
+    last event is always "answer".
+    """
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue()
+
+    def emit(event, data):
+        loop.call_soon_threadsafe(events.put_nowait, (event, data))
+
+    root = start_span("query", streamed=True)
+
+    def run():
+        try:
+            emit("answer", _run_under(root, answer_prompt, prompt, upload_id,
+                                      enable_image, final_top_k, on_stage=emit))
+        except Exception as e:
+            emit(None, e)
+
+    worker = asyncio.ensure_future(asyncio.to_thread(run))
+    error = None
+    try:
+        while True:
+            event, data = await events.get()
+            if event is None:
+                raise data
+            yield event, data
+            if event == "answer":
+                break
+        await worker
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        end_span(root, error)
+
+async def answer_prompt_async(prompt, upload_id, enable_image=False, final_top_k=10):
+    result = None
+    async for event, data in stream_answer(prompt, upload_id, enable_image, final_top_k):
+        if event == "answer":
+            result = data
+    return result
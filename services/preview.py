@@ -1,6 +1,7 @@
 # services/preview.py
 import uuid
 from parser.file_intake import parse_file
+from services.trace import traced, count
 
 def preview_files(paths):
     results = []
@@ -9,12 +10,28 @@ def preview_files(paths):
         results.extend(items)
     return results
 
+@traced("merge_files")
 def merge_files(paths):
     items = preview_files(paths)
-    merged = [it["content"] for it in items if it.get("content")]
-    full_text = "\n".join(merged).strip()
+    count("candidates_out", len(items))
+
+    # segments record where each file sits in the merged text, for citations
+    merged = []
+    segments = []
+    offset = 0
+    for it in items:
+        if not it.get("content"):
+            continue
+        if merged:
+            offset += 1  # the "\n" separator
+        merged.append(it["content"])
+        segments.append({"filename": it["filename"], "start": offset, "end": offset + len(it["content"])})
+        offset += len(it["content"])
+
+    full_text = "\n".join(merged)
     return {
         "name": f"merged-{uuid.uuid4()}.txt",
         "content": full_text,
-        "files_merged": [it["filename"] for it in items]
+        "files_merged": [it["filename"] for it in items],
+        "segments": segments
     }
@@ -0,0 +1,262 @@
+# services/registry.py
+"""
+Study-set registry: one row per upload_id (= Pinecone namespace) with its
+size and last-access time, plus the garbage collector that deletes stale
+namespaces so the shared index stays within budget.
+
+Eviction policy, applied by collect_garbage():
+  1. every set not accessed for STUDYSET_TTL_HOURS is deleted;
+  2. if the remaining sets still hold more than INDEX_BUDGET_CHUNKS vectors,
+     the least recently used ones are deleted until the total fits.
+A set used within the last STUDYSET_GRACE_MINUTES (or one just registered)
+is never evicted, even if that leaves the index over budget.
+"""
+import os
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from services.store import delete_namespaces, namespace_sizes
+from services.trace import span
+
+REGISTRY_PATH = os.getenv("RAG_REGISTRY_PATH", "study_sets.db")
+STUDYSET_TTL_HOURS = float(os.getenv("RAG_STUDYSET_TTL_HOURS", "72"))
+INDEX_BUDGET_CHUNKS = int(os.getenv("RAG_INDEX_BUDGET_CHUNKS", "100000"))
+STUDYSET_GRACE_MINUTES = float(os.getenv("RAG_STUDYSET_GRACE_MINUTES", "30"))
+GC_INTERVAL_SECONDS = float(os.getenv("RAG_GC_INTERVAL_SECONDS", "600"))
+
+# last-access writes for the same set are coalesced to at most one per window
+TOUCH_WINDOW_SECONDS = 60
+
+class StudySetTooLarge(Exception):
+    """
+    One study set holds more chunks than the whole index budget, so GC could never make room for it.
+    """
+
+
+class StudySetNotFound(LookupError):
+    """
+    The study set was never registered or has since been evicted.
+    """
+
+
+_lock = threading.Lock()
+_gc_lock = threading.Lock()
+_last_touch = {}
+_gc_thread = None
+
+
+@contextmanager
+def _connect():
+    conn = sqlite3.connect(REGISTRY_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS study_sets (
+            upload_id   TEXT PRIMARY KEY,
+            name        TEXT,
+            chunks      INTEGER NOT NULL DEFAULT 0,
+            files       INTEGER NOT NULL DEFAULT 0,
+            created_at  REAL NOT NULL,
+            last_access REAL NOT NULL
+        )
+    """)
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def register(upload_id, name, chunks, files=0):
+    now = time.time()
+    with _connect() as conn:
+        conn.execute(
+            """
+            INSERT INTO study_sets (upload_id, name, chunks, files, created_at, last_access)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(upload_id) DO UPDATE SET
+                name = excluded.name, chunks = excluded.chunks,
+                files = excluded.files, last_access = excluded.last_access
+            """,
+            (upload_id, name, chunks, files, now, now),
+        )
+    with _lock:
+        _last_touch[upload_id] = now
+
+    if total_chunks() > INDEX_BUDGET_CHUNKS:
+        collect_garbage_async(protect=(upload_id,))
+
+
+def touch(upload_id):
+    now = time.time()
+    with _lock:
+        if now - _last_touch.get(upload_id, 0) < TOUCH_WINDOW_SECONDS:
+            return
+        _last_touch[upload_id] = now
+    with _connect() as conn:
+        conn.execute("UPDATE study_sets SET last_access = ? WHERE upload_id = ?", (now, upload_id))
+
+
+def get(upload_id):
+    with _connect() as conn:
+        row = conn.execute("SELECT * FROM study_sets WHERE upload_id = ?", (upload_id,)).fetchone()
+    return dict(row) if row else None
+
+
+def exists(upload_id):
+    """
+    Whether the set is registered or, for sets from before the registry, still has vectors.
+    """
+    if get(upload_id) is not None:
+        return True
+    return upload_id in (namespace_sizes() or {})
+
+
+def list_sets():
+    with _connect() as conn:
+        rows = conn.execute("SELECT * FROM study_sets ORDER BY last_access DESC").fetchall()
+    return [dict(r) for r in rows]
+
+
+def total_chunks():
+    with _connect() as conn:
+        return conn.execute("SELECT COALESCE(SUM(chunks), 0) FROM study_sets").fetchone()[0]
+
+
+def _remove(upload_ids):
+    with _connect() as conn:
+        conn.executemany("DELETE FROM study_sets WHERE upload_id = ?", [(u,) for u in upload_ids])
+    with _lock:
+        for u in upload_ids:
+            _last_touch.pop(u, None)
+
+
+def forget(upload_id):
+    """
+    Explicit delete, e.g. when the user clears a study set.
+    """
+    try:
+        deleted = delete_namespaces([upload_id])
+    except Exception as e:
+        print(f"Study set delete failed for {upload_id}: {e}")
+        return False
+    _remove(deleted)
+    return bool(deleted)
+
+
+def select_evictions(sets, now=None, ttl_hours=None, budget=None, grace_minutes=None, protect=()):
+    """
+    Pure policy: given registry rows, returns the upload_ids to delete.
+    Sets accessed within the grace window and the ids in `protect` are kept.
+    """
+    now = now or time.time()
+    ttl = (STUDYSET_TTL_HOURS if ttl_hours is None else ttl_hours) * 3600
+    budget = INDEX_BUDGET_CHUNKS if budget is None else budget
+    grace = (STUDYSET_GRACE_MINUTES if grace_minutes is None else grace_minutes) * 60
+
+    kept = set(protect)
+    kept.update(s["upload_id"] for s in sets if now - s["last_access"] < grace)
+
+    by_age = sorted(sets, key=lambda s: s["last_access"])
+    evict = [s["upload_id"] for s in by_age if now - s["last_access"] > ttl and s["upload_id"] not in kept]
+
+    evicted = set(evict)
+    remaining = sum(s["chunks"] for s in by_age if s["upload_id"] not in evicted)
+    for s in by_age:
+        if remaining <= budget:
+            break
+        if s["upload_id"] in evicted or s["upload_id"] in kept:
+            continue
+        evict.append(s["upload_id"])
+        remaining -= s["chunks"]
+
+    return evict
+
+
+def adopt_orphans():
+    """
+    Registers namespaces that exist in the index but not in the registry
+    (e.g. created before the registry existed), so the TTL applies to them too.
+    Does nothing while the index does not exist.
+    """
+    sizes = namespace_sizes()
+    if sizes is None:
+        return []
+    known = {s["upload_id"] for s in list_sets()}
+    now = time.time()
+    adopted = []
+    with _connect() as conn:
+        for name, vectors in sizes.items():
+            if not name or name in known:
+                continue
+            conn.execute(
+                "INSERT OR IGNORE INTO study_sets (upload_id, name, chunks, files, created_at, last_access) "
+                "VALUES (?, ?, ?, 0, ?, ?)",
+                (name, None, vectors, now, now),
+            )
+            adopted.append(name)
+    return adopted
+
+
+def collect_garbage(adopt=False, protect=()):
+    """
+    Applies the eviction policy and deletes the chosen namespaces in one pass.
+    Only one collection runs at a time; concurrent callers return immediately.
+    """
+    if not _gc_lock.acquire(blocking=False):
+        return []
+    try:
+        with span("collect_garbage") as sp:
+            if adopt:
+                sp.count("adopted", len(adopt_orphans()))
+            sets = list_sets()
+            evict = select_evictions(sets, protect=protect)
+            sp.count("candidates_in", len(sets))
+
+            left = sum(s["chunks"] for s in sets if s["upload_id"] not in evict)
+            if left > INDEX_BUDGET_CHUNKS:
+                sp.set(over_budget=left)
+                print(f"Study sets in use hold {left} chunks, over the budget of {INDEX_BUDGET_CHUNKS}")
+
+            if not evict:
+                return []
+            deleted = delete_namespaces(evict)
+            _remove(deleted)
+            sp.count("candidates_out", len(deleted))
+            return deleted
+    finally:
+        _gc_lock.release()
+
+
+def collect_garbage_async(protect=()):
+    threading.Thread(
+        target=collect_garbage, kwargs={"protect": protect}, daemon=True, name="studyset-gc"
+    ).start()
+
+
+def _gc_loop(interval):
+    first = True
+    while True:
+        try:
+            collect_garbage(adopt=first)
+            first = False
+        except Exception as e:
+            print(f"Study set GC failed: {e}")
+        time.sleep(interval)
+
+
+def start_gc_thread(interval=None):
+    """
+    Starts the periodic collector once per process. Safe to call on every Streamlit rerun.
+    """
+    global _gc_thread
+    with _lock:
+        if _gc_thread is not None:
+            return _gc_thread
+        _gc_thread = threading.Thread(
+            target=_gc_loop, args=(interval or GC_INTERVAL_SECONDS,), daemon=True, name="studyset-gc-loop"
+        )
+        _gc_thread.start()
+        return _gc_thread
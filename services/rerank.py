@@ -1,13 +1,16 @@
 # services/rerank.py
 from openai import OpenAI
 import os
+from services.trace import traced, count, record_api_call
 
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 RERANK_MODEL = "gpt-4o-mini"
 
+@traced("rerank")
 def rerank(query, chunks):
     ranked = []
+    count("candidates_in", len(chunks))
 
     for c in chunks:
         prompt = f"""
@@ -23,13 +26,16 @@ Output ONLY the number.
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.0,
             )
+            record_api_call(resp)
             score_str = resp.choices[0].message.content.strip()
             score = float(score_str)
         except:
+            count("errors")
             score = 0.0
             
         c["rerank_score"] = score
         ranked.append(c)
 
     ranked.sort(key=lambda x: x["rerank_score"], reverse=True)
+    count("candidates_out", len(ranked))
     return ranked
\ No newline at end of file
@@ -3,6 +3,7 @@ import os
 from dotenv import load_dotenv
 from pinecone import Pinecone
 from openai import OpenAI
+from services.trace import traced, count, current_span, record_api_call, record_cache
 
 load_dotenv()
 
@@ -12,21 +13,43 @@ MODEL = "text-embedding-3-large"
 pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
 openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
+# Index handle is cached once the index is known to exist; a missing index is
+# re-checked on every call because store_chunks may create it later.
+_index = None
+
+@traced("embed_query")
 def embed_query(q):
     r = openai_client.embeddings.create(
         model=MODEL,
         input=q
     )
+    record_api_call(r)
     return r.data[0].embedding
 
 
-def retrieve_chunks(query, upload_id, limit=5, threshold=0.0):
+def get_index():
+    global _index
+    if _index is not None:
+        record_cache(True)
+        return _index
+
+    record_cache(False)
     # ensure index exists
     indexes = pc.list_indexes().names()
+    record_api_call()
     if INDEX_NAME not in indexes:
-        return []   # nothing stored yet
+        return None   # nothing stored yet
 
-    index = pc.Index(INDEX_NAME)
+    _index = pc.Index(INDEX_NAME)
+    return _index
+
+
+@traced("retrieve_chunks")
+def retrieve_chunks(query, upload_id, limit=5, threshold=0.0):
+    current_span().set(top_k=limit, threshold=threshold)
+    index = get_index()
+    if index is None:
+        return []
 
     vec = embed_query(query)
 
@@ -36,6 +59,7 @@ def retrieve_chunks(query, upload_id, limit=5, threshold=0.0):
         top_k=limit,
         include_metadata=True
     )
+    record_api_call()
 
     out = []
     for m in result.matches:
@@ -46,7 +70,11 @@ def retrieve_chunks(query, upload_id, limit=5, threshold=0.0):
                 "text": m.metadata.get("text"),
                 "tokens": m.metadata.get("tokens"),
                 "source_files": m.metadata.get("source_files"),
+                "page_start": m.metadata.get("page_start"),
+                "page_end": m.metadata.get("page_end"),
                 "upload_id": m.metadata.get("upload_id")
             })
 
+    count("candidates_in", len(result.matches))
+    count("candidates_out", len(out))
     return out
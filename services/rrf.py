@@ -1,5 +1,7 @@
 # services/rrf.py
+from services.trace import traced, count
 
+@traced("rrf_fuse")
 def rrf_fuse(dense_chunks, sparse_chunks, k=60):
     """
     dense_chunks  = list of chunks sorted semantically (pinecone)
@@ -15,6 +17,8 @@ def rrf_fuse(dense_chunks, sparse_chunks, k=60):
 
     # all participating chunk IDs
     all_ids = set(dense_rank.keys()) | set(sparse_rank.keys())
+    count("candidates_in", len(dense_chunks) + len(sparse_chunks))
+    count("candidates_out", len(all_ids))
 
     fused = []
     for cid in all_ids:
@@ -1,29 +1,55 @@
 # services/store.py
 import os
 import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pinecone import Pinecone, ServerlessSpec
+from pinecone.exceptions import NotFoundException
+from services.trace import span, traced, count, record_api_call
 
 INDEX_NAME = "rag-chunks"
 DIM = 3072
 
 pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
 
+# background ingest workers may race to create the index on first use
+_index_lock = threading.Lock()
+
+# parallel namespace deletes per collection; Pinecone has no multi-namespace delete
+DELETE_WORKERS = 8
+
 
 def get_index():
+    with _index_lock:
+        indexes = pc.list_indexes().names()
+        record_api_call()
+        if INDEX_NAME not in indexes:
+            pc.create_index(
+                name=INDEX_NAME,
+                dimension=DIM,
+                metric="cosine",
+                spec=ServerlessSpec(
+                    cloud="aws",
+                    region="us-east-1"  # can be changed to match your OPENAI region but not required
+                )
+            )
+            record_api_call()
+    return pc.Index(INDEX_NAME)
+
+
+def existing_index():
+    """
+    The index if it already exists, else None. Never creates it, so
+    maintenance paths don't provision a billable index on their own.
+    """
     indexes = pc.list_indexes().names()
+    record_api_call()
     if INDEX_NAME not in indexes:
-        pc.create_index(
-            name=INDEX_NAME,
-            dimension=DIM,
-            metric="cosine",
-            spec=ServerlessSpec(
-                cloud="aws",
-                region="us-east-1"  # can be changed to match your OPENAI region but not required
-            )
-        )
+        return None
     return pc.Index(INDEX_NAME)
 
 
+@traced("store_chunks")
 def store_chunks(upload_id, upload_name, chunks, vectors):
     index = get_index()
     namespace = upload_id
@@ -32,17 +58,79 @@ def store_chunks(upload_id, upload_name, chunks, vectors):
     for c, v in zip(chunks, vectors):
         pid = f"{upload_id}-{c['chunk_index']}"
 
+        metadata = {
+            "upload_id": upload_id,
+            "upload_name": upload_name,
+            "chunk_index": c["chunk_index"],
+            "text": c["text"],
+            "tokens": c["tokens"],
+            "source_files": c["source_files"],
+        }
+        # Pinecone rejects null metadata values
+        for key in ("page_start", "page_end"):
+            if c.get(key) is not None:
+                metadata[key] = c[key]
+
         payloads.append({
             "id": pid,
             "values": v,
-            "metadata": {
-                "upload_id": upload_id,
-                "upload_name": upload_name,
-                "chunk_index": c["chunk_index"],
-                "text": c["text"],
-                "tokens": c["tokens"],
-                "source_files": c["source_files"],
-            }
+            "metadata": metadata
         })
 
+    count("candidates_in", len(payloads))
     index.upsert(vectors=payloads, namespace=namespace)
+    record_api_call()
+
+
+def delete_namespaces(upload_ids):
+    """
+    Drops every vector of the given study sets, one delete request per
+    namespace sent concurrently. Returns the ids that were deleted; ids whose
+    namespace (or the whole index) no longer exists count as deleted.
+    """
+    if not upload_ids:
+        return []
+
+    with span("delete_namespaces") as sp:
+        index = existing_index()
+        if index is None:
+            sp.set(index_missing=True)
+            return list(upload_ids)
+
+        def delete(upload_id):
+            try:
+                index.delete(delete_all=True, namespace=upload_id)
+            except NotFoundException:
+                pass  # namespace already gone, which is what we wanted
+
+        deleted = []
+        workers = min(DELETE_WORKERS, len(upload_ids))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ns-delete") as pool:
+            futures = [(upload_id, pool.submit(delete, upload_id)) for upload_id in upload_ids]
+            for upload_id, future in futures:
+                try:
+                    future.result()
+                    record_api_call()
+                    deleted.append(upload_id)
+                except Exception as e:
+                    sp.count("errors")
+                    print(f"Namespace delete failed for {upload_id}: {e}")
+        sp.count("candidates_out", len(deleted))
+        return deleted
+
+
+def namespace_sizes():
+    """
+    Vector count per namespace, straight from the index stats, or None when
+    the index does not exist yet.
+    """
+    index = existing_index()
+    if index is None:
+        return None
+    stats = index.describe_index_stats()
+    record_api_call()
+    namespaces = stats["namespaces"] if isinstance(stats, dict) else stats.namespaces
+    out = {}
+    for name, summary in (namespaces or {}).items():
+        out[name] = summary["vector_count"] if isinstance(summary, dict) else summary.vector_count
+    return out
@@ -0,0 +1,237 @@
+# services/trace.py
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# both opt-in: the trace file grows by one span tree per ingest/query
+TRACE_FILE = os.getenv("RAG_TRACE_FILE")
+METRICS_PORT = os.getenv("RAG_METRICS_PORT")
+
+_current_span = ContextVar("rag_current_span", default=None)
+
+_lock = threading.Lock()
+_stage_seconds = {}   # stage -> [count, total_seconds]
+_stage_counts = {}    # (stage, metric) -> total
+
+_metrics_server = None
+
+
+class Span:
+    """
+    One timed stage of the pipeline. Spans nest through a context variable,
+    so a stage called inside another one becomes its child.
+    """
+
+    def __init__(self, name, attrs=None, parent=None):
+        self.name = name
+        self.attrs = dict(attrs or {})
+        self.counts = {}
+        self.children = []
+        self.parent = parent
+        self.started_at = time.time()
+        self.duration = 0.0
+        self._t0 = time.perf_counter()
+
+    def count(self, metric, n=1):
+        if not n:
+            return
+        self.counts[metric] = self.counts.get(metric, 0) + n
+        with _lock:
+            key = (self.name, metric)
+            _stage_counts[key] = _stage_counts.get(key, 0) + n
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def total(self, metric):
+        """
+        Sum of a counter over this span and all of its descendants.
+        """
+        return self.counts.get(metric, 0) + sum(c.total(metric) for c in self.children)
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "started_at": round(self.started_at, 6),
+            "duration_ms": round(self.duration * 1000, 3),
+            "attrs": self.attrs,
+            "counts": self.counts,
+            "children": [c.to_dict() for c in self.children],
+        }
+
+
+def start_span(name, **attrs):
+    """
+    Opens a span without making it current. Pair with end_span(); use
+    activate() to run work under it, e.g. from worker threads.
+    """
+    return Span(name, attrs, parent=_current_span.get())
+
+
+def end_span(s, error=None):
+    s.duration = time.perf_counter() - s._t0
+    if error is not None:
+        s.attrs["error"] = f"{type(error).__name__}: {error}"
+        s.count("errors")
+    with _lock:
+        stat = _stage_seconds.setdefault(s.name, [0, 0.0])
+        stat[0] += 1
+        stat[1] += s.duration
+    if s.parent is not None:
+        s.parent.children.append(s)
+    else:
+        export_span(s)
+
+
+@contextmanager
+def activate(s):
+    token = _current_span.set(s)
+    try:
+        yield s
+    finally:
+        _current_span.reset(token)
+
+
+@contextmanager
+def span(name, **attrs):
+    s = start_span(name, **attrs)
+    error = None
+    try:
+        with activate(s):
+            yield s
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        end_span(s, error)
+
+
+def traced(name):
+    """
+    Decorator form of span() for whole pipeline functions.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_span():
+    return _current_span.get()
+
+
+def count(metric, n=1):
+    """
+    Adds to a counter on the innermost active span. No-op outside a span.
+    """
+    s = _current_span.get()
+    if s is not None:
+        s.count(metric, n)
+
+
+def record_api_call(resp=None):
+    """
+    Counts one API call and the token usage reported on its response, if any.
+    """
+    count("api_calls")
+    usage = getattr(resp, "usage", None)
+    if usage is None:
+        return
+    count("input_tokens", getattr(usage, "prompt_tokens", 0) or 0)
+    count("output_tokens", getattr(usage, "completion_tokens", 0) or 0)
+
+
+def record_cache(hit):
+    count("cache_hits" if hit else "cache_misses")
+
+
+def export_span(s):
+    if not TRACE_FILE:
+        return
+    line = json.dumps(s.to_dict(), default=str)
+    with _lock:
+        with open(TRACE_FILE, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+def breakdown(s, depth=0):
+    """
+    Flattens a span tree into (depth, name, milliseconds, counts) rows for display.
+    """
+    rows = [(depth, s.name, s.duration * 1000, s.counts)]
+    for c in s.children:
+        rows.extend(breakdown(c, depth + 1))
+    return rows
+
+
+def render_prometheus():
+    with _lock:
+        seconds = {k: list(v) for k, v in _stage_seconds.items()}
+        counts = dict(_stage_counts)
+
+    lines = [
+        "# HELP rag_stage_seconds Wall time spent in each pipeline stage.",
+        "# TYPE rag_stage_seconds summary",
+    ]
+    for stage, (n, total) in sorted(seconds.items()):
+        lines.append(f'rag_stage_seconds_sum{{stage="{stage}"}} {total:.6f}')
+        lines.append(f'rag_stage_seconds_count{{stage="{stage}"}} {n}')
+
+    lines.append("# HELP rag_stage_events_total Calls, tokens, candidates and cache lookups per stage.")
+    lines.append("# TYPE rag_stage_events_total counter")
+    for (stage, metric), total in sorted(counts.items()):
+        lines.append(f'rag_stage_events_total{{stage="{stage}",event="{metric}"}} {total}')
+
+    return "\n".join(lines) + "\n"
+
+
+def reset_metrics():
+    with _lock:
+        _stage_seconds.clear()
+        _stage_counts.clear()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port=None):
+    """
+    Serves /metrics in a daemon thread. Safe to call on every Streamlit rerun.
+    """
+    global _metrics_server
+    port = port or METRICS_PORT
+    if not port:
+        return None
+
+    with _lock:
+        if _metrics_server is not None:
+            return _metrics_server
+        try:
+            _metrics_server = ThreadingHTTPServer(("0.0.0.0", int(port)), _MetricsHandler)
+        except OSError as e:
+            print(f"Metrics server not started on port {port}: {e}")
+            return None
+
+    threading.Thread(target=_metrics_server.serve_forever, daemon=True).start()
+    return _metrics_server
@@ -0,0 +1,25 @@
+# ui/sources.py
+
+def _pages(start, end):
+    if start is None:
+        return ""
+    start, end = int(start), int(end if end is not None else start)
+    return f" (p. {start})" if start == end else f" (p. {start}–{end})"
+
+def sources_caption(sources):
+    """
+    One line like "📎 Sources: notes.pdf (p. 3–4), slides.pptx" for the answer bubble.
+    """
+    seen = []
+    for s in sources or []:
+        files = s.get("source_files") or []
+        # page numbers only make sense when the chunk came from a single file
+        pages = _pages(s.get("page_start"), s.get("page_end")) if len(files) == 1 else ""
+        for f in files:
+            label = f"{f}{pages}"
+            if label not in seen:
+                seen.append(label)
+
+    if not seen:
+        return None
+    return "📎 Sources: " + ", ".join(seen)
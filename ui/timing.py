@@ -0,0 +1,27 @@
+# ui/timing.py
+import streamlit as st
+from services.trace import breakdown
+
+def timing_breakdown_widget(root_span):
+    """
+    Shows the span tree of the last answer as an indented table in the sidebar.
+    """
+    if root_span is None:
+        return
+
+    with st.sidebar.expander(f"⏱️ Last answer: {root_span.duration:.2f}s", expanded=True):
+        rows = []
+        for depth, name, ms, counts in breakdown(root_span):
+            rows.append({
+                "stage": ("  " * depth) + name,
+                "ms": round(ms, 1),
+                "calls": counts.get("api_calls", 0),
+                "tokens in/out": f"{counts.get('input_tokens', 0)}/{counts.get('output_tokens', 0)}",
+                "candidates": counts.get("candidates_out", counts.get("candidates_in", "")),
+            })
+        st.dataframe(rows, hide_index=True, use_container_width=True)
+        st.caption(
+            f"API calls: {root_span.total('api_calls')} · "
+            f"tokens: {root_span.total('input_tokens')} in / {root_span.total('output_tokens')} out · "
+            f"cache hits: {root_span.total('cache_hits')}"
+        )
@@ -1,4 +1,5 @@
 # ui/upload.py
+import os
 import streamlit as st
 import tempfile
 
@@ -16,9 +17,10 @@ def upload_files_widget():
 
     tmp_paths = []
     for f in uploaded_files:
-        suffix = "." + f.name.split(".")[-1]
-        tmp = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
-        tmp.write(f.getbuffer())
-        tmp_paths.append(tmp.name)
+        # keep the real file name (one temp dir per file) so sources cite it
+        path = os.path.join(tempfile.mkdtemp(prefix="upload_"), os.path.basename(f.name))
+        with open(path, "wb") as tmp:
+            tmp.write(f.getbuffer())
+        tmp_paths.append(path)
 
     return tmp_paths